@@ -1,9 +1,5 @@
 # app.py
 import streamlit as st
-import plotly.graph_objects as go
-import numpy as np
-from backend.rrg import calculate_rrg
-from backend.data import load_price_data
 
 # ----------------------------
 # Streamlit Page Config
@@ -18,18 +14,35 @@ st.set_page_config(
 # ----------------------------
 st.sidebar.title("⚙️ Controls")
 
+# Slider bounds; the whole grid is precomputed so slider moves are lookups
+EMA_PERIODS = range(5, 31)
+ROC_PERIODS = range(5, 31)
+MAX_TAIL_LENGTH = 20
+
+# Weekly and monthly bars are resampled from one shared daily history, sized for
+# the selected timeframe at the largest slider settings (see backend.data.rrg_window)
+# and extended with older bars the first time a longer timeframe is chosen
+TIMEFRAME_OPTIONS = {"Daily": "daily", "Weekly": "weekly", "Monthly": "monthly"}
+
+timeframe = TIMEFRAME_OPTIONS[st.sidebar.radio(
+    "Timeframe",
+    options=list(TIMEFRAME_OPTIONS),
+    horizontal=True,
+    help="Bar size for the EMA, ROC and tail periods below"
+)]
+
 ema_period = st.sidebar.slider(
     "RS-Ratio EMA Period",
-    min_value=5,
-    max_value=30,
+    min_value=EMA_PERIODS[0],
+    max_value=EMA_PERIODS[-1],
     value=10,
     step=1
 )
 
 roc_period = st.sidebar.slider(
     "RS-Momentum ROC Period",
-    min_value=5,
-    max_value=30,
+    min_value=ROC_PERIODS[0],
+    max_value=ROC_PERIODS[-1],
     value=12,
     step=1
 )
@@ -37,11 +50,35 @@ roc_period = st.sidebar.slider(
 tail_length = st.sidebar.slider(
     "Tail Length (Periods)",
     min_value=2,
-    max_value=20,
+    max_value=MAX_TAIL_LENGTH,
     value=5,
     step=1
 )
 
+# Missing-bar policy of the alignment stage (see backend.alignment.FILL_POLICIES)
+FILL_OPTIONS = {"Skip": "none", "Carry forward": "ffill"}
+
+fill = FILL_OPTIONS[st.sidebar.radio(
+    "Missing bars",
+    options=list(FILL_OPTIONS),
+    horizontal=True,
+    help="A sector's missing bars on benchmark trading days are either skipped or filled with its previous close"
+)]
+
+# ----------------------------
+# Diagnostics
+# ----------------------------
+# Stage timings are only recorded while the box is ticked, and only this session's
+# run is collected; the panel is filled in at the end of the run
+from backend import diagnostics
+
+diagnostics_panel = st.sidebar.expander("🩺 Diagnostics")
+show_diagnostics = diagnostics_panel.checkbox(
+    "Record stage timings",
+    help="Time fetch, RRG calculation, plotting and serialization, and log each span as a JSON line"
+)
+run_diagnostics = diagnostics.collect(show_diagnostics)
+
 SECTOR_TICKERS = {
     "Bank": "^NSEBANK",
     "PSU Bank": "^NSEPSUBANK",
@@ -55,259 +92,181 @@ SECTOR_TICKERS = {
     "Media": "^CNXMEDIA",
 }
 
-selected_sectors = st.sidebar.multiselect(
-    "Select Sectors",
-    options=list(SECTOR_TICKERS.keys()),
-    default=["Bank", "IT", "FMCG"]
-)
+# Every benchmark is loaded and computed in the same pass, so switching is a filter
+BENCHMARK_TICKERS = {
+    "Nifty 50": "^NSEI",
+    "Nifty 500": "^CRSLDX",
+    "Nifty Midcap 100": "NIFTY_MIDCAP_100.NS",
+}
+PRIMARY_BENCHMARK = "^NSEI"
+EXTRA_BENCHMARKS = {t: t for t in BENCHMARK_TICKERS.values() if t != PRIMARY_BENCHMARK}
 
-# ----------------------------
-# Validation
-# ----------------------------
-if len(selected_sectors) < 2:
-    st.warning("Select at least 2 sectors to view RRG.")
-    st.stop()
+benchmark_name = st.sidebar.selectbox("Benchmark", options=list(BENCHMARK_TICKERS))
+benchmark = BENCHMARK_TICKERS[benchmark_name]
 
-# ----------------------------
-# Data Load
-# ----------------------------
-price_data = load_price_data(
-    {k: SECTOR_TICKERS[k] for k in selected_sectors},
-    benchmark="^NSEI"
+view_mode = st.sidebar.radio(
+    "View",
+    options=["Sector indices", "Index constituents"],
+    help="Constituents plot individual stocks from a list in universes/ against the benchmark"
 )
 
-# ----------------------------
-# RRG Calculation
-# ----------------------------
-rrg_metrics = calculate_rrg(
-    data=price_data,
-    rs_period=ema_period,
-    roc_period=roc_period,
-    tail_length=tail_length
-)
 
-# ----------------------------
-# Plot Function
-# ----------------------------
-def plot_rrg(rrg_metrics):
-    fig = go.Figure()
-
-    # Color palette for sectors (distinct colors)
-    color_palette = [
-        '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
-        '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
-        '#aec7e8', '#ffbb78', '#98df8a', '#ff9896', '#c5b0d5'
-    ]
-
-    sectors = rrg_metrics["sector"].unique()
-    sector_colors = {sector: color_palette[i % len(color_palette)] for i, sector in enumerate(sectors)}
-
-    # Axis lock (reference style) with gridlines
-    fig.update_xaxes(
-        range=[90, 110],
-        title="JdK RS-Ratio",
-        zeroline=False,
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        griddash='dot'
-    )
-    fig.update_yaxes(
-        range=[88, 112],
-        title="JdK RS-Momentum",
-        zeroline=False,
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        griddash='dot'
-    )
+def resolve_benchmarks(price_data, selected):
+    """
+    (benchmark to show, every benchmark that loaded); falls back to Nifty 50
+    with a warning when the selected one did not load.
+    """
+    if selected not in price_data:
+        st.warning(f"{benchmark_name} data is unavailable; showing Nifty 50 instead.")
+        selected = PRIMARY_BENCHMARK
+    return selected, [t for t in BENCHMARK_TICKERS.values() if t in price_data]
 
-    # Quadrant backgrounds
-    quadrants = [
-        dict(x0=90, x1=100, y0=100, y1=112, fillcolor="#e8ecff"),  # Improving
-        dict(x0=100, x1=110, y0=100, y1=112, fillcolor="#e9f7e6"), # Leading
-        dict(x0=90, x1=100, y0=88, y1=100, fillcolor="#fde8e8"),  # Lagging
-        dict(x0=100, x1=110, y0=88, y1=100, fillcolor="#fff4db"), # Weakening
-    ]
-
-    for q in quadrants:
-        fig.add_shape(type="rect", line=dict(width=0), layer="below", **q)
-
-    # Center lines
-    fig.add_shape(type="line", x0=100, x1=100, y0=88, y1=112, line=dict(color="black", width=1))
-    fig.add_shape(type="line", x0=90, x1=110, y0=100, y1=100, line=dict(color="black", width=1))
-
-    # Quadrant labels
-    quadrant_labels = [
-        dict(x=92, y=110, text="Improving", showarrow=False, font=dict(size=14, color="gray")),
-        dict(x=108, y=110, text="Leading", showarrow=False, font=dict(size=14, color="gray")),
-        dict(x=92, y=90, text="Lagging", showarrow=False, font=dict(size=14, color="gray")),
-        dict(x=108, y=90, text="Weakening", showarrow=False, font=dict(size=14, color="gray")),
-    ]
-
-    for label in quadrant_labels:
-        fig.add_annotation(**label)
-
-    # Plot each sector
-    for sector in rrg_metrics["sector"].unique():
-        df = rrg_metrics[rrg_metrics["sector"] == sector]
-
-        x_vals = df["rs_ratio"].values
-        y_vals = df["rs_momentum"].values
-
-        sector_color = sector_colors[sector]
-
-        if len(x_vals) < 2:
-            continue  # not enough points for tail
-
-        # Draw the complete tail as a single line (more visible)
-        # Tail line - solid line connecting all historical points
-        fig.add_trace(go.Scatter(
-            x=x_vals[:-1],
-            y=y_vals[:-1],
-            mode="lines",
-            line=dict(width=3, color=sector_color),
-            opacity=0.6,
-            name=sector,
-            legendgroup=sector,
-            showlegend=False,
-            hoverinfo="skip"
-        ))
-
-        # Add markers on the tail with gradient size (older = smaller)
-        for i in range(len(x_vals) - 1):
-            # Marker size increases as we get closer to current position
-            marker_size = 4 + (i / (len(x_vals) - 1)) * 4  # Range from 4 to 8
-            opacity = 0.4 + (i / (len(x_vals) - 1)) * 0.4  # Range from 0.4 to 0.8
-
-            fig.add_trace(go.Scatter(
-                x=[x_vals[i]],
-                y=[y_vals[i]],
-                mode="markers",
-                marker=dict(
-                    size=marker_size,
-                    color=sector_color,
-                    line=dict(width=1, color="white")
-                ),
-                opacity=opacity,
-                name=sector,
-                legendgroup=sector,
-                showlegend=False,
-                hoverinfo="skip"
-            ))
-
-        # Calculate arrow direction - use last 2 points for most accurate direction
-        dx = x_vals[-1] - x_vals[-2]
-        dy = y_vals[-1] - y_vals[-2]
-
-        # Only use 3 points if movement is very small (to avoid jitter)
-        movement_magnitude = np.sqrt(dx**2 + dy**2)
-        if movement_magnitude < 0.5 and len(x_vals) >= 3:
-            dx = x_vals[-1] - x_vals[-3]
-            dy = y_vals[-1] - y_vals[-3]
-
-        # Add a marker at the latest point (for hover and visibility)
-        fig.add_trace(go.Scatter(
-            x=[x_vals[-1]],
-            y=[y_vals[-1]],
-            mode="markers",
-            marker=dict(
-                symbol="circle",
-                size=10,
-                color=sector_color,
-                line=dict(width=2, color="white")
-            ),
-            name=sector,
-            legendgroup=sector,
-            hovertemplate=(
-                f"<b>{sector}</b><br>"
-                "RS-Ratio: %{x:.2f}<br>"
-                "RS-Momentum: %{y:.2f}<br>"
-                "<extra></extra>"
-            )
-        ))
-
-        # Add arrow annotation (this stays intact during zoom)
-        # Arrow points from second-to-last to last position
-        arrow_start_x = x_vals[-2]
-        arrow_start_y = y_vals[-2]
-        arrow_end_x = x_vals[-1]
-        arrow_end_y = y_vals[-1]
-
-        fig.add_annotation(
-            x=arrow_end_x,
-            y=arrow_end_y,
-            ax=arrow_start_x,
-            ay=arrow_start_y,
-            xref='x',
-            yref='y',
-            axref='x',
-            ayref='y',
-            showarrow=True,
-            arrowhead=2,
-            arrowsize=1.5,
-            arrowwidth=3,
-            arrowcolor=sector_color,
-            opacity=0.8
-        )
 
-        # Position label very close to arrow tip, slightly offset to avoid overlap
-        # Use a small offset perpendicular to arrow direction for better readability
-        offset_distance = 1.2  # Reduced from 2.5 to keep label closer
-        angle = np.arctan2(dy, dx)  # Calculate angle from movement direction
-
-        # Offset slightly perpendicular to arrow direction (90 degrees)
-        perpendicular_angle = angle + np.pi/4  # 45 degrees offset
-        label_offset_x = offset_distance * np.cos(perpendicular_angle)
-        label_offset_y = offset_distance * np.sin(perpendicular_angle)
-
-        fig.add_annotation(
-            x=x_vals[-1] + label_offset_x,
-            y=y_vals[-1] + label_offset_y,
-            text=f"<b>{sector}</b>",
-            showarrow=False,
-            font=dict(size=9, color=sector_color, family="Arial", weight="bold"),
-            bgcolor="rgba(255, 255, 255, 0.95)",
-            bordercolor=sector_color,
-            borderwidth=1,
-            borderpad=2,
-            xanchor="center",
-            yanchor="middle"
-        )
+def for_benchmark(rrg_all, selected):
+    """One benchmark's rows of a multi-benchmark RRG frame."""
+    rows = rrg_all[rrg_all["benchmark"] == selected]
+    return rows.drop(columns="benchmark").reset_index(drop=True)
+
 
+if view_mode == "Sector indices":
+    selected_sectors = st.sidebar.multiselect(
+        "Select Sectors",
+        options=list(SECTOR_TICKERS.keys()),
+        default=["Bank", "IT", "FMCG"]
+    )
 
-    fig.update_layout(
-        height=700,
-        margin=dict(l=40, r=200, t=40, b=40),
-        plot_bgcolor="white",
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.02,
-            bgcolor="rgba(255, 255, 255, 0.9)",
-            bordercolor="lightgray",
-            borderwidth=1,
-            font=dict(size=11)
+    # ----------------------------
+    # Validation
+    # ----------------------------
+    if len(selected_sectors) < 2:
+        st.warning("Select at least 2 sectors to view RRG.")
+        st.stop()
+
+    replay_history = st.sidebar.checkbox(
+        "Replay history",
+        help="Animate rotation over the loaded history; scrubbing runs in the browser"
+    )
+
+    # Compute stack is imported only once there is something to compute
+    import pandas as pd
+    from backend.data import rrg_window, trim_history
+    from backend.memo import memo_replay, memo_rrg, memo_timeframe
+    from backend.shared import get_shared_store
+
+    # ----------------------------
+    # Data Load
+    # ----------------------------
+    # One close-only panel per process, shared by all sessions and refreshed in
+    # the background; only a sector no session has loaded yet, or older history
+    # on the first switch to a longer timeframe, is fetched here
+    window_bars, history_period = rrg_window(EMA_PERIODS[-1], ROC_PERIODS[-1], MAX_TAIL_LENGTH, timeframe)
+    history = memo_timeframe(
+        get_shared_store(history_period).panel(
+            {**{k: SECTOR_TICKERS[k] for k in selected_sectors}, **EXTRA_BENCHMARKS},
+            benchmark=PRIMARY_BENCHMARK
         ),
-        hovermode='closest',
-        # Enable hover highlighting - when hovering over a trace, others become dimmed
-        hoverlabel=dict(
-            bgcolor="white",
-            font_size=12,
-            font_family="Arial"
-        )
+        timeframe
+    )
+    # The slider grid only ever reads the last window_bars bars
+    price_data = trim_history(history, window_bars)
+    benchmark, benchmarks = resolve_benchmarks(price_data, benchmark)
+    plotted = [k for k in selected_sectors if k in price_data]
+
+    # ----------------------------
+    # RRG Calculation
+    # ----------------------------
+    # Tails are memoized per (benchmark, sector, EMA, ROC) for the whole slider
+    # grid and every benchmark; tail_length is a slice on top and the benchmark
+    # a filter, so changing either does no computation
+    rrg_metrics = for_benchmark(
+        memo_rrg(
+            data=price_data,
+            rs_period=ema_period,
+            roc_period=roc_period,
+            tail_length=tail_length,
+            benchmark=benchmarks,
+            rs_periods=EMA_PERIODS,
+            roc_periods=ROC_PERIODS,
+            max_tail=MAX_TAIL_LENGTH,
+            fill=fill
+        ),
+        benchmark
     )
 
-    # Update traces to support hover highlighting
-    # When you hover over one sector, others will be dimmed
-    for trace in fig.data:
-        trace.update(
-            hoverlabel=dict(namelength=-1)
+    # ----------------------------
+    # History Replay
+    # ----------------------------
+    # The full history is computed once per parameters; frames only slice it
+    if replay_history:
+        replay = memo_replay(
+            history.select([benchmark, *plotted]),
+            rs_period=ema_period,
+            roc_period=roc_period,
+            benchmark=benchmark,
+            fill=fill
+        )
+        replay_dates = replay.replay_dates(tail_length)
+        # Bar dates differ per timeframe, so each gets its own slider state
+        replay_start = st.sidebar.select_slider(
+            "Replay from",
+            options=list(replay_dates.date),
+            value=replay_dates[replay_dates >= replay_dates[-1] - pd.DateOffset(years=1)][0].date(),
+            key=f"replay_start_{timeframe}"
         )
 
-    return fig
+else:
+    from backend.data import rrg_window, trim_history
+    from backend.memo import memo_rrg, memo_timeframe
+    from backend.shared import get_shared_store
+    from backend.universe import attach_groups, list_universes, load_universe
+
+    universes = list_universes()
+    if not universes:
+        st.warning("No constituent lists found. Add a CSV (e.g. NSE's ind_nifty500list.csv) to universes/.")
+        st.stop()
+
+    universe_name = st.sidebar.selectbox("Universe", options=list(universes))
+    universe = load_universe(universes[universe_name])
+
+    # Drill down into one industry, or show the whole universe
+    selected_group = st.sidebar.selectbox(
+        "Industry",
+        options=["All"] + sorted(universe["group"].unique())
+    )
+    if selected_group != "All":
+        universe = universe[universe["group"] == selected_group]
+
+    # Same store as the sector view; only the current settings' window is computed
+    history_period = rrg_window(EMA_PERIODS[-1], ROC_PERIODS[-1], MAX_TAIL_LENGTH, timeframe)[1]
+    with st.spinner(f"Loading {len(universe)} constituents..."):
+        price_data = trim_history(
+            memo_timeframe(
+                get_shared_store(history_period).panel(
+                    {**{ticker: ticker for ticker in universe["ticker"]}, **EXTRA_BENCHMARKS},
+                    benchmark=PRIMARY_BENCHMARK
+                ),
+                timeframe
+            ),
+            rrg_window(ema_period, roc_period, tail_length, timeframe)[0]
+        )
+    benchmark, benchmarks = resolve_benchmarks(price_data, benchmark)
+    plotted = [t for t in universe["ticker"] if t in price_data]
+
+    # Only the selected combination; the full grid is too large at this scale
+    rrg_metrics = attach_groups(
+        for_benchmark(
+            memo_rrg(
+                data=price_data,
+                rs_period=ema_period,
+                roc_period=roc_period,
+                tail_length=tail_length,
+                benchmark=benchmarks,
+                fill=fill
+            ),
+            benchmark
+        ),
+        universe
+    )
 
 # ----------------------------
 # Main Layout
@@ -330,7 +289,13 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-fig = plot_rrg(rrg_metrics)
+# Plotly is only needed from here on
+from backend.plot import plot_rrg, plot_rrg_animation
+
+if view_mode == "Sector indices" and replay_history:
+    fig = plot_rrg_animation(replay, tail_length, replay_dates[replay_dates >= pd.Timestamp(replay_start)])
+else:
+    fig = plot_rrg(rrg_metrics)
 
 # Custom configuration for better interactivity
 config = {
@@ -346,7 +311,79 @@ config = {
     }
 }
 
-st.plotly_chart(fig, use_container_width=True, config=config)
+if show_diagnostics:
+    with diagnostics.span("serialize") as timing:
+        timing["bytes"] = len(fig.to_json())
+
+with diagnostics.span("st.plotly_chart"):
+    st.plotly_chart(fig, use_container_width=True, config=config)
+
+# ----------------------------
+# Quadrant Transitions
+# ----------------------------
+# Transitions over the loaded history are detected once and extended as new
+# bars arrive; the table lists those within the plotted tail
+from backend.memo import memo_alerts
+
+alerts = memo_alerts(price_data.select([benchmark, *plotted]), ema_period, roc_period, benchmark, fill=fill)
+
+st.markdown("### 🔔 Quadrant Transitions")
+named_only = st.checkbox(
+    "Alerts only",
+    value=True,
+    help="Moves to an adjacent quadrant, clockwise (Lagging → Improving → Leading → Weakening → Lagging) or back; "
+         "untick to include diagonal jumps"
+)
+transitions = alerts.events(since=price_data.dates[-min(tail_length, len(price_data.dates))], alerts_only=named_only)
+if transitions.empty:
+    st.caption(f"No quadrant transitions in the last {tail_length} bars.")
+else:
+    st.dataframe(
+        transitions.iloc[::-1].assign(date=lambda df: df["date"].dt.date).round(2),
+        hide_index=True,
+        use_container_width=True
+    )
+
+if show_diagnostics:
+    import pandas as pd
+    from backend.alignment import align_prices
+    from backend.data import get_fetch_scheduler
+    from backend.memo import memo_stats
+    from backend.shared import get_shared_store
+
+    spans, counters = run_diagnostics.snapshot()
+    with diagnostics_panel:
+        st.caption("Stages (this run)")
+        st.dataframe(pd.DataFrame(diagnostics.summarize(spans)).round(1), hide_index=True)
+
+        fetches = [entry for entry in spans if entry["stage"] == "fetch.ticker"]
+        if fetches:
+            st.caption("Per-ticker fetch latency")
+            st.dataframe(pd.DataFrame(fetches).drop(columns="stage").sort_values("ms", ascending=False), hide_index=True)
+
+        payload = [entry["bytes"] for entry in spans if entry["stage"] == "serialize"]
+        if payload:
+            st.caption(f"Figure payload: {payload[-1] / 1e3:,.0f} KB")
+
+        report = align_prices(price_data, benchmarks, fill=fill).report
+        gaps = report[(report["missing"] > 0) | (report["extra"] > 0)]
+        st.caption(f"Missing bars ({len(gaps)} of {len(report)} series)")
+        if not gaps.empty:
+            st.dataframe(gaps)
+
+        st.caption("Caches")
+        st.dataframe(pd.DataFrame(memo_stats()), hide_index=True)
+
+        store = get_shared_store().stats()
+        st.caption(
+            f"Shared prices: {store['tickers']} tickers, {store['bytes'] / 1e6:,.1f} MB, "
+            f"refreshed {store['refreshed_at']:%H:%M:%S}, next {store['next_refresh']:%a %H:%M} IST"
+        )
+        if counters:
+            st.json(counters)
+
+        st.caption("Fetch scheduler (since start-up)")
+        st.json(get_fetch_scheduler().metrics())
 
 # Add footer info
 st.markdown("---")
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from backend.rrg import QUADRANTS, classify_quadrants, rrg_history
+
+# Transitions worth an alert, by (from, to) quadrant: every move to an adjacent
+# quadrant. A diagonal move (ratio and momentum both cross 100) is a "Jump"
+ALERTS = {
+    # Clockwise, the usual rotation
+    ("Lagging", "Improving"): "Turning up",
+    ("Improving", "Leading"): "Entering Leading",
+    ("Leading", "Weakening"): "Losing momentum",
+    ("Weakening", "Lagging"): "Breaking down",
+    # Counter-clockwise, a rotation reversing
+    ("Weakening", "Leading"): "Regaining momentum",
+    ("Leading", "Improving"): "Losing strength",
+    ("Improving", "Lagging"): "Failed turn",
+    ("Lagging", "Weakening"): "Gaining strength",
+}
+
+EVENT_COLUMNS = ["date", "sector", "from", "to", "alert", "rs_ratio", "rs_momentum"]
+
+# Alert name per (from code, to code)
+_ALERT_NAMES = np.array(
+    [[ALERTS.get((a, b), "Jump") for b in QUADRANTS] for a in QUADRANTS], dtype=object
+)
+
+
+def detect_transitions(codes, previous=None):
+    """
+    Vectorized quadrant changes over a dates x columns array of quadrant codes.
+
+    A column's missing rows (-1) are skipped, so a change is always measured
+    against its last known quadrant, including across calls.
+
+    Args:
+        codes: int8 array from classify_quadrants
+        previous: Last known code per column before the first row (-1 for none)
+
+    Returns:
+        (rows, columns, from_codes, last): positions and previous codes of
+        every change in date order, and the last known code per column
+        (pass it as `previous` for the next block).
+    """
+    codes = np.asarray(codes, dtype=np.int8)
+    if previous is None:
+        previous = np.full(codes.shape[1], -1, dtype=np.int8)
+
+    # Carry each column's last known code forward over its missing rows
+    stacked = np.vstack([previous[None, :], codes])
+    known = np.where(stacked >= 0, np.arange(len(stacked))[:, None], 0)
+    np.maximum.accumulate(known, axis=0, out=known)
+    carried = np.take_along_axis(stacked, known, axis=0)
+
+    before = carried[:-1]
+    changed = (codes >= 0) & (before >= 0) & (codes != before)
+    rows, columns = np.nonzero(changed)
+    return rows, columns, before[rows, columns], carried[-1]
+
+
+class QuadrantAlerts:
+    """
+    Quadrant transitions for a whole universe, kept up to date bar by bar.
+
+    Seeded from a full RS-Ratio / RS-Momentum history in one vectorized pass;
+    later bars are folded in with `extend` (a block) or `update` (one bar),
+    which only classify the new rows against each column's last quadrant.
+
+    Example:
+        alerts = QuadrantAlerts.from_prices(price_data, 10, 12)
+        alerts.update({"IT": 101.2}, {"IT": 100.4}, date="2024-07-01")
+        alerts.events(since="2024-06-01", alerts_only=True)
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.last_date = None
+        self._index = {column: j for j, column in enumerate(self.columns)}
+        self._codes = np.full(len(self.columns), -1, dtype=np.int8)
+        self._events = []
+
+    @classmethod
+    def from_history(cls, rs_ratio: pd.DataFrame, rs_momentum: pd.DataFrame):
+        """Seed from rrg_history's dates x columns frames."""
+        alerts = cls(rs_ratio.columns)
+        alerts.extend(rs_ratio, rs_momentum)
+        return alerts
+
+    @classmethod
+    def from_prices(cls, data, rs_period, roc_period, benchmark="^NSEI", **align_kwargs):
+        """Seed from a load_price_data dict or PricePanel (see rrg_history)."""
+        return cls.from_history(*rrg_history(data, rs_period, roc_period, benchmark, **align_kwargs))
+
+    def extend(self, rs_ratio: pd.DataFrame, rs_momentum: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fold in every row of dates x columns frames newer than `last_date`.
+
+        Returns:
+            The new events (see events).
+        """
+        if self.last_date is not None:
+            newer = rs_ratio.index > self.last_date
+            rs_ratio, rs_momentum = rs_ratio[newer], rs_momentum[newer]
+        if rs_ratio.empty:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        for column in rs_ratio.columns:
+            if column not in self._index:
+                self._add_column(column)
+        return self._fold(
+            rs_ratio.index,
+            rs_ratio.reindex(columns=self.columns).to_numpy(dtype=float),
+            rs_momentum.reindex(columns=self.columns).to_numpy(dtype=float)
+        )
+
+    def update(self, rs_ratio, rs_momentum, date) -> pd.DataFrame:
+        """
+        Fold in one bar.
+
+        Args:
+            rs_ratio: Mapping of column -> RS-Ratio for this bar; columns left
+                out keep their last quadrant
+            rs_momentum: Mapping of column -> RS-Momentum
+            date: Bar date; bars not after `last_date` are ignored
+        """
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        for column in rs_ratio:
+            if column not in self._index:
+                self._add_column(column)
+        ratio = np.full((1, len(self.columns)), np.nan)
+        momentum = np.full((1, len(self.columns)), np.nan)
+        for column, value in rs_ratio.items():
+            ratio[0, self._index[column]] = value
+        for column, value in rs_momentum.items():
+            momentum[0, self._index[column]] = value
+        return self._fold(pd.DatetimeIndex([date]), ratio, momentum)
+
+    def _fold(self, dates, ratio, momentum) -> pd.DataFrame:
+        """Classify dates x columns arrays against the last known quadrants and record the changes."""
+        rows, columns, from_codes, self._codes = detect_transitions(classify_quadrants(ratio, momentum), self._codes)
+        self.last_date = dates[-1]
+
+        quadrants = np.asarray(QUADRANTS, dtype=object)
+        to_codes = classify_quadrants(ratio[rows, columns], momentum[rows, columns])
+        events = pd.DataFrame({
+            "date": dates[rows],
+            "sector": np.asarray(self.columns, dtype=object)[columns],
+            "from": quadrants[from_codes],
+            "to": quadrants[to_codes],
+            "alert": _ALERT_NAMES[from_codes, to_codes],
+            "rs_ratio": ratio[rows, columns],
+            "rs_momentum": momentum[rows, columns],
+        })
+        if not events.empty:
+            self._events.append(events)
+        return events
+
+    def _add_column(self, column):
+        self._index[column] = len(self.columns)
+        self.columns.append(column)
+        self._codes = np.append(self._codes, np.int8(-1))
+
+    def quadrants(self) -> pd.Series:
+        """Latest known quadrant per column (None before its first value)."""
+        return pd.Series([QUADRANTS[code] if code >= 0 else None for code in self._codes], index=self.columns)
+
+    def events(self, since=None, alerts_only: bool = False) -> pd.DataFrame:
+        """
+        Every transition seen so far, oldest first.
+
+        Columns: date, sector, from, to, alert (an ALERTS name, or "Jump" for
+        a diagonal move), rs_ratio and rs_momentum at the new quadrant.
+
+        Args:
+            since: Only events on or after this date
+            alerts_only: Only the transitions named in ALERTS (no diagonal jumps)
+        """
+        if not self._events:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        events = pd.concat(self._events, ignore_index=True)
+        if since is not None:
+            events = events[events["date"] >= pd.Timestamp(since)]
+        if alerts_only:
+            events = events[events["alert"] != "Jump"]
+        return events.reset_index(drop=True)
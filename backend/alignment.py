@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+from backend.diagnostics import span
+from backend.panel import PricePanel
+
+# How a sector's missing bars on benchmark trading days are treated:
+#   "none"  - left missing; the sector's ratio skips those dates (per-series dropna)
+#   "ffill" - carried forward from its previous close, so every sector moves on
+#             the benchmark's clock (at most `fill_limit` bars in a row)
+FILL_POLICIES = ("none", "ffill")
+
+
+class AlignedCloses:
+    """
+    The benchmark(s) and every sector on one master trading calendar.
+
+    Built once by align_prices; every later stage (relative strength, EMA,
+    ROC, replay) reads these contiguous blocks instead of aligning series
+    pairwise.
+
+    Attributes:
+        dates: Master calendar, the union of every series' trading dates
+        sectors: Column labels of `closes`
+        closes: (len(dates), len(sectors)) float64 array, NaN where a sector
+            has no bar (after the fill policy)
+        benchmarks: Column labels of `benchmark_closes`
+        benchmark_closes: (len(dates), len(benchmarks)) float64 array
+        report: Missing-bar report, one row per series (see align_prices)
+    """
+
+    def __init__(self, dates, sectors, closes, benchmarks, benchmark_closes, report):
+        self.dates = dates
+        self.sectors = sectors
+        self.closes = closes
+        self.benchmarks = benchmarks
+        self.benchmark_closes = benchmark_closes
+        self.report = report
+
+    def relative_strength(self) -> np.ndarray:
+        """
+        Sector / benchmark ratios as one dates x (benchmarks x sectors) array,
+        benchmark-major: column `b * len(sectors) + s` is sector s against
+        benchmark b.
+        """
+        rel = self.closes[:, None, :] / self.benchmark_closes[:, :, None]
+        return rel.reshape(len(rel), -1)
+
+    def frames(self, single: bool = True):
+        """
+        (closes, benchmark_close) as DataFrame / Series on the master calendar;
+        benchmark_close is a dates x benchmarks frame unless `single`.
+        """
+        closes = pd.DataFrame(self.closes, index=self.dates, columns=self.sectors)
+        if single:
+            return closes, pd.Series(self.benchmark_closes[:, 0], index=self.dates, name="Close")
+        return closes, pd.DataFrame(self.benchmark_closes, index=self.dates, columns=self.benchmarks)
+
+
+def align_prices(data, benchmark="^NSEI", fill="none", fill_limit=None) -> AlignedCloses:
+    """
+    Join the benchmark(s) and all sectors onto one master trading calendar.
+
+    The calendar is built once for every series together (a PricePanel's
+    dates, or one union over a load_price_data dict) and the closes are
+    scattered into a single matrix, so no downstream stage aligns indexes.
+
+    Args:
+        data: load_price_data dict or PricePanel
+        benchmark: Key of the benchmark in `data`, or a list of keys
+        fill: One of FILL_POLICIES
+        fill_limit: Most consecutive bars "ffill" carries a close over
+            (counted in benchmark trading days); None for no limit
+
+    Returns:
+        AlignedCloses. Its report is a DataFrame indexed by key with:
+            bars: bars the series has on the calendar
+            first, last: its first and last bar
+            missing: calendar dates between first and last without a bar;
+                for sectors, only benchmark trading days count
+            extra: sector bars on days no benchmark traded (unused by the ratio)
+            filled: missing bars the fill policy supplied
+    """
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"Unknown fill policy {fill!r}; expected one of {FILL_POLICIES}")
+
+    benchmarks = [benchmark] if isinstance(benchmark, str) else list(benchmark)
+    sectors = [key for key in data if key not in benchmarks]
+    if not sectors:
+        raise ValueError("No valid sector data found. Please check your data sources and try again.")
+
+    with span("align", series=len(benchmarks) + len(sectors), fill=fill) as timing:
+        panel = data if isinstance(data, PricePanel) else PricePanel.from_frames(data)
+        keys = [*benchmarks, *sectors]
+        panel = panel.select(keys)
+        dates = panel.dates
+        matrix = np.ascontiguousarray(panel.closes, dtype=float)
+        timing["dates"] = len(dates)
+        if not len(dates):
+            raise ValueError("No valid sector data found. Please check your data sources and try again.")
+
+        valid = ~np.isnan(matrix)
+        on_benchmark = valid[:, :len(benchmarks)].any(axis=1)
+
+        # Sectors are judged against the benchmark calendar, benchmarks against the master one
+        counted = np.ones_like(valid)
+        counted[:, len(benchmarks):] = on_benchmark[:, None]
+        span_rows = _within_span(valid)
+        missing = (span_rows & counted & ~valid).sum(axis=0)
+        extra = (valid & ~counted).sum(axis=0)
+
+        filled = np.zeros(len(keys), dtype=int)
+        if fill == "ffill":
+            rows = np.flatnonzero(on_benchmark)
+            block = pd.DataFrame(matrix[rows, len(benchmarks):])
+            block = block.ffill(limit=fill_limit, limit_area="inside").to_numpy()
+            filled[len(benchmarks):] = (np.isnan(matrix[rows, len(benchmarks):]) & ~np.isnan(block)).sum(axis=0)
+            matrix[rows, len(benchmarks):] = block
+
+    bars = valid.sum(axis=0)
+    first = np.where(bars > 0, valid.argmax(axis=0), 0)
+    last = np.where(bars > 0, len(valid) - 1 - valid[::-1].argmax(axis=0), 0)
+    report = pd.DataFrame({
+        "bars": bars,
+        "first": dates[first].where(bars > 0),
+        "last": dates[last].where(bars > 0),
+        "missing": missing,
+        "extra": extra,
+        "filled": filled,
+    }, index=pd.Index(keys, name="key"))
+
+    return AlignedCloses(
+        dates,
+        sectors,
+        np.ascontiguousarray(matrix[:, len(benchmarks):]),
+        benchmarks,
+        np.ascontiguousarray(matrix[:, :len(benchmarks)]),
+        report
+    )
+
+
+def _within_span(valid: np.ndarray) -> np.ndarray:
+    """True from each column's first valid row through its last."""
+    started = np.logical_or.accumulate(valid, axis=0)
+    not_ended = np.logical_or.accumulate(valid[::-1], axis=0)[::-1]
+    return started & not_ended
@@ -0,0 +1,155 @@
+"""
+Headless batch RRG: compute and export without Streamlit or Plotly.
+
+Example:
+    python -m backend.cli --universe sectors --universe nifty_it \
+        --benchmark ^NSEI --rs-period 10 --roc-period 12 --tail-length 5 \
+        --format parquet --output-dir out/
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from backend.alignment import FILL_POLICIES
+from backend.data import EWM_TOLERANCE, FETCH_MODES, SECTOR_TICKERS, TIMEFRAMES, rrg_window, trim_history
+from backend.memo import memo_price_data, memo_rrg, memo_timeframe
+from backend.providers import safe_filename
+from backend.rrg import QUADRANTS, classify_quadrants
+from backend.series_store import SERIES_DIR, SeriesStore
+from backend.universe import attach_groups, list_universes, load_universe, load_universe_prices
+
+OUTPUT_FORMATS = ("parquet", "json", "csv")
+
+
+def _resolve_universe(spec: str):
+    """'sectors', a name from universes/ or a CSV path -> (name, universe or None)."""
+    if spec == "sectors":
+        return "sectors", None
+
+    universes = list_universes()
+    path = universes.get(spec, spec)
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown universe {spec!r}. Available: sectors, {', '.join(universes)}")
+
+    return os.path.splitext(os.path.basename(path))[0], load_universe(path)
+
+
+def compute_universe(spec, benchmarks, args):
+    """
+    RRG frame for one universe against every benchmark, computed in one pass.
+    The first benchmark is required; others that fail to load are skipped.
+    """
+    name, universe = _resolve_universe(spec)
+    bars, period = rrg_window(args.rs_period, args.roc_period, args.tail_length, args.timeframe, args.ewm_tolerance)
+    # The stored series start from the first bar loaded, so --store loads the whole history
+    load_kwargs = dict(period=args.period or ("max" if args.store else period), fetch_mode=args.fetch_mode)
+    primary, extra = benchmarks[0], {b: b for b in benchmarks[1:]}
+
+    if universe is None:
+        data = memo_price_data({**SECTOR_TICKERS, **extra}, primary, **load_kwargs)
+    else:
+        data = load_universe_prices(universe, primary, loader=memo_price_data, **load_kwargs)
+        if extra:
+            data.update(memo_price_data(extra, primary, **load_kwargs))
+
+    history = memo_timeframe(data, args.timeframe)
+    data = trim_history(history, bars)
+    if primary not in data:
+        raise ValueError(f"No recent data for benchmark {primary}")
+    loaded = [b for b in benchmarks if b in data]
+    rrg = memo_rrg(data, args.rs_period, args.roc_period, args.tail_length, benchmark=loaded, fill=args.fill)
+
+    if args.store:
+        # Append the newly closed bars to the full history, one series per ticker and
+        # benchmark; a fill policy changes the series, so it gets its own directory.
+        # The untrimmed history is stored, so the series continue from the last run
+        layout = args.timeframe if args.fill == "none" else f"{args.timeframe}_{args.fill}"
+        store = SeriesStore(os.path.join(args.store, layout))
+        for benchmark in loaded:
+            subset = {key: df for key, df in history.items() if key == benchmark or key not in benchmarks}
+            try:
+                store.update(subset, args.rs_period, args.roc_period, benchmark, timeframe=args.timeframe, fill=args.fill)
+            except ValueError as e:
+                print(f"Warning: Not storing {name} vs {benchmark}: {e}", file=sys.stderr)
+
+    if universe is not None:
+        rrg = attach_groups(rrg, universe)
+
+    rrg["timeframe"] = args.timeframe
+    rrg["quadrant"] = [QUADRANTS[code] for code in classify_quadrants(rrg["rs_ratio"], rrg["rs_momentum"])]
+    return name, rrg
+
+
+def write_output(df, path: str, fmt: str) -> None:
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "json":
+        df.to_json(path, orient="records", indent=2)
+    else:
+        df.to_csv(path, index=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.cli",
+        description="Compute Relative Rotation Graph metrics and export them."
+    )
+    parser.add_argument("--universe", action="append",
+                        help="'sectors' (built-in sector indices), a list in universes/ or a CSV path; repeatable")
+    parser.add_argument("--benchmark", action="append", help="Benchmark ticker; repeatable (default ^NSEI)")
+    parser.add_argument("--rs-period", type=int, default=10, help="RS-Ratio EMA period")
+    parser.add_argument("--roc-period", type=int, default=12, help="RS-Momentum ROC period")
+    parser.add_argument("--tail-length", type=int, default=5, help="Points of history per ticker")
+    parser.add_argument("--period", help="Price history to load, e.g. 6mo, 1y (default: just enough for the RRG parameters)")
+    parser.add_argument("--ewm-tolerance", type=float, default=EWM_TOLERANCE,
+                        help="Seed weight the RS-Ratio EMA may keep; history beyond what this needs is not fetched "
+                             "or computed (0 uses the whole --period)")
+    parser.add_argument("--timeframe", choices=tuple(TIMEFRAMES), default="daily",
+                        help="Bar size; weekly and monthly bars are resampled from the daily history")
+    parser.add_argument("--fill", choices=FILL_POLICIES, default="none",
+                        help="Skip a ticker's missing bars on benchmark trading days, or carry its close forward")
+    parser.add_argument("--store", nargs="?", const=SERIES_DIR,
+                        help=f"Also append the full RS-Ratio/RS-Momentum series to this directory (default {SERIES_DIR}); "
+                             "loads the whole history unless --period is given")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="batch")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet")
+    parser.add_argument("--output-dir", default="rrg_output")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    universes = args.universe or ["sectors"]
+    benchmarks = args.benchmark or ["^NSEI"]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failures = 0
+    for spec in universes:
+        started = time.perf_counter()
+        try:
+            name, rrg = compute_universe(spec, benchmarks, args)
+        except ValueError as e:
+            print(f"✗ {spec} vs {', '.join(benchmarks)}: {e}", file=sys.stderr)
+            failures += len(benchmarks)
+            continue
+        elapsed = time.perf_counter() - started
+
+        # One file per universe/benchmark pair, as before the single-pass computation
+        for benchmark in benchmarks:
+            rows = rrg[rrg["benchmark"] == benchmark].reset_index(drop=True)
+            if rows.empty:
+                print(f"✗ {spec} vs {benchmark}: no benchmark data", file=sys.stderr)
+                failures += 1
+                continue
+
+            path = os.path.join(args.output_dir, f"{name}_{safe_filename(benchmark)}.{args.format}")
+            write_output(rows, path, args.format)
+            print(f"✓ {name} vs {benchmark}: {rows['sector'].nunique()} tickers -> {path} ({elapsed:.2f}s)")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
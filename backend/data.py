@@ -1,6 +1,17 @@
-import yfinance as yf
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+import numpy as np
 import pandas as pd
 
+from backend.diagnostics import bind, count, span
+from backend.panel import PricePanel
+from backend.providers import PriceProvider, period_start, provider_from_env, safe_filename
+
 
 # Central place for all sector tickers
 SECTOR_TICKERS = {
@@ -16,11 +27,568 @@ SECTOR_TICKERS = {
     "Media": "^CNXMEDIA",
 }
 
+# Benchmarks the dashboard can switch between (Nifty 50 first, the default)
+BENCHMARK_TICKERS = {
+    "Nifty 50": "^NSEI",
+    "Nifty 500": "^CRSLDX",
+    "Nifty Midcap 100": "NIFTY_MIDCAP_100.NS",
+}
+
+FETCH_MODES = ("batch", "serial", "concurrent")
+
+# Bar sizes derived from the daily series; None keeps daily bars
+TIMEFRAMES = {
+    "daily": None,
+    "weekly": "W-FRI",
+    "monthly": "ME",
+}
+
+# How each OHLCV column rolls up into a longer bar (other columns keep their last value)
+BAR_AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+# --- History window ---
+# Weight the RS-Ratio EMA may still give its seed value once warmed up
+EWM_TOLERANCE = 1e-3
+BARS_PER_YEAR = {"daily": 248, "weekly": 52, "monthly": 12}
+# Periods every provider accepts (yfinance rejects anything in between), shortest first
+HISTORY_PERIODS = ("1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max")
+HISTORY_SLACK = 1.1   # extra calendar time for exchange holidays
+
+# Concurrent fetch tuning
+FETCH_MAX_WORKERS = 8
+FETCH_RETRIES = 3             # attempts per ticker, including the first
+FETCH_BACKOFF = 0.5           # seconds; doubled after every failed attempt
+FETCH_TIMEOUT = 20.0          # hard per-ticker deadline in seconds, retries included
+
+# Upstream rate limit shared by every fetch in the process (rate-limited providers only)
+FETCH_RATE = float(os.environ.get("RRG_FETCH_RATE", 10))   # requests per second
+FETCH_BURST = 20                                            # requests allowed back to back
+
+# On-disk price cache: one Parquet file per ticker
+CACHE_DIR = os.environ.get(
+    "RRG_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "prices")
+)
+CACHE_MAX_AGE = pd.Timedelta(minutes=15)   # how long a refreshed file is trusted without asking the provider
+
+
+class PriceCache:
+    """
+    Persistent per-ticker OHLCV cache stored as Parquet files.
+
+    A cached ticker is served without touching the network when it was
+    refreshed within `max_age`, or when no trading days (weekdays) have
+    passed since its last complete bar. Otherwise only the missing dates
+    are fetched and merged in.
+    """
+
+    # Allow for weekends/holidays between a period's start date and its first bar
+    COVERAGE_SLACK = pd.Timedelta(days=5)
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_age: pd.Timedelta = CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.cache_dir, f"{safe_filename(ticker)}.parquet")
+
+    def _full_marker(self, ticker: str) -> str:
+        return os.path.join(self.cache_dir, f"{safe_filename(ticker)}.max")
+
+    def mark_full_history(self, ticker: str) -> None:
+        """Record that the cached file starts at the ticker's first bar (a period="max" download)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        open(self._full_marker(ticker), "a").close()
+
+    def has_full_history(self, ticker: str) -> bool:
+        return os.path.exists(self._full_marker(ticker))
+
+    def read(self, ticker: str):
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Warning: Discarding unreadable cache file for {ticker}: {str(e)}")
+            os.remove(path)
+            return None
+
+    def write(self, ticker: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(ticker)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)   # atomic, so readers never see a half-written file
+
+    def touch(self, ticker: str) -> None:
+        """Mark a ticker as freshly checked without changing its data."""
+        path = self.path(ticker)
+        if os.path.exists(path):
+            os.utime(path, None)
+
+    def is_fresh(self, ticker: str) -> bool:
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return False
+
+        age = pd.Timestamp.now() - pd.Timestamp.fromtimestamp(os.path.getmtime(path))
+        return age <= self.max_age
+
+    def plan(self, ticker: str, start, cached: pd.DataFrame = None):
+        """
+        Work out what has to be fetched for `ticker` to cover `start`..today.
+        `start` None means the whole history ("max"), which a cached file
+        covers once a full download has been marked with mark_full_history.
+
+        Returns:
+            None if the cache already covers the window,
+            ("full", None) if the whole period must be downloaded,
+            ("topup", last_cached_date) if only bars from that date on are missing.
+        """
+        if cached is None:
+            cached = self.read(ticker)
+        if cached is None or cached.empty:
+            return ("full", None)
+
+        first, last = cached.index.min(), cached.index.max()
+        if start is None and not self.has_full_history(ticker):
+            return ("full", None)
+        if start is not None and first > start + self.COVERAGE_SLACK:
+            return ("full", None)
+
+        today = pd.Timestamp.now().normalize()
+        missing = pd.bdate_range(last.normalize() + pd.Timedelta(days=1), today)
+        if self.is_fresh(ticker) or (missing.empty and last.normalize() < today):
+            return None
+
+        # Re-fetch the last cached bar too, it may have been a partial intraday bar
+        return ("topup", last.normalize())
+
+    def merge(self, ticker: str, cached, new: pd.DataFrame) -> pd.DataFrame:
+        """Append newly fetched bars to the cached frame and persist the result."""
+        if cached is None or cached.empty:
+            merged = new
+        else:
+            merged = pd.concat([cached[cached.index < new.index.min()], new])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        self.write(ticker, merged)
+        return merged
+
+    def invalidate(self, tickers=None) -> None:
+        """Remove cached files for `tickers`, or the whole cache when None."""
+        if tickers is None:
+            if not os.path.isdir(self.cache_dir):
+                return
+            paths = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+                if name.endswith(".parquet")
+            ]
+        else:
+            paths = [self.path(ticker) for ticker in tickers]
+
+        paths += [path[:-len(".parquet")] + ".max" for path in paths]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+_price_cache = PriceCache()
+
+
+def get_price_cache() -> PriceCache:
+    return _price_cache
+
+
+def clear_price_cache(tickers=None) -> None:
+    """Explicitly invalidate cached prices for `tickers` (all tickers when None)."""
+    _price_cache.invalidate(tickers)
+
+
+_default_provider = None
+
+
+def get_default_provider() -> PriceProvider:
+    """Provider used when load_price_data is not given one (see RRG_PRICE_PROVIDER)."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = provider_from_env()
+    return _default_provider
+
+
+def set_default_provider(provider: PriceProvider) -> None:
+    global _default_provider
+    _default_provider = provider
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most
+    `burst`. A rate of 0 or None disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> float:
+        """
+        Take `tokens`, sleeping until they are available.
+
+        Returns:
+            Seconds spent waiting.
+
+        Raises:
+            TimeoutError: if they would not be available within `timeout`
+        """
+        if not self.rate:
+            return 0.0
+
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return now - started
+                wait_for = (tokens - self._tokens) / self.rate
+
+            if timeout is not None and now - started + wait_for > timeout:
+                raise TimeoutError(f"Rate limit: no request slot within {timeout:.0f}s")
+            time.sleep(wait_for)
+
+
+class _Flight:
+    """One in-progress provider request that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def resolve(self, result=None, error=None) -> None:
+        self.result, self.error = result, error
+        self.done.set()
+
+    def wait(self, timeout: float = None):
+        if not self.done.wait(timeout):
+            raise TimeoutError(f"No response within {timeout:.0f}s")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class FetchScheduler:
+    """
+    Gatekeeper for every provider request made by load_price_data.
+
+    Concurrent requests for the same (provider, ticker, window) share one
+    in-flight fetch (single-flight), and requests to rate-limited providers
+    draw from a process-wide token bucket so bursts from several sessions or
+    jobs don't get throttled upstream. `metrics()` reports what happened.
+    """
+
+    def __init__(self, rate: float = FETCH_RATE, burst: int = FETCH_BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,         # tickers asked for
+            "coalesced": 0,        # ... served by another caller's in-flight fetch
+            "provider_calls": 0,   # requests actually sent (a batch counts once)
+            "errors": 0,
+            "throttled_s": 0.0,    # total time spent waiting for the rate limit
+        }
+
+    def _bump(self, name: str, n=1) -> None:
+        with self._lock:
+            self._metrics[name] += n
+
+    def _claim(self, provider, tickers: list, window: dict):
+        """Split `tickers` into flights this caller leads and ones already in flight."""
+        window_key = tuple(sorted(window.items()))
+        led, joined = {}, {}
+        with self._lock:
+            self._metrics["requests"] += len(tickers)
+            for ticker in tickers:
+                key = (provider, ticker, window_key)
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    led[ticker] = (key, flight)
+                else:
+                    joined[ticker] = flight
+            self._metrics["coalesced"] += len(joined)
+        return led, joined
+
+    def _release(self, led: dict) -> None:
+        with self._lock:
+            for key, _ in led.values():
+                self._inflight.pop(key, None)
+
+    def _throttle(self, provider, timeout: float = None) -> None:
+        if provider.rate_limited:
+            self._bump("throttled_s", self.bucket.acquire(timeout=timeout))
+        self._bump("provider_calls")
+
+    def fetch_one(self, provider, ticker: str, timeout: float = None, **window) -> pd.DataFrame:
+        """provider.fetch_one, coalesced and rate limited."""
+        led, joined = self._claim(provider, [ticker], window)
+        if joined:
+            return joined[ticker].wait(timeout or FETCH_TIMEOUT)
+
+        flight = led[ticker][1]
+        try:
+            started = time.monotonic()
+            self._throttle(provider, timeout)
+            remaining = None if timeout is None else max(timeout - (time.monotonic() - started), 0)
+            df = provider.fetch_one(ticker, timeout=remaining, **window)
+        except Exception as e:
+            self._bump("errors")
+            flight.resolve(error=e)
+            raise
+        finally:
+            self._release(led)
+
+        flight.resolve(df)
+        return df
+
+    def fetch(self, provider, tickers: list, **window):
+        """
+        provider.fetch for the tickers nobody else is fetching, one request
+        for all of them; the rest wait on the fetches already in flight.
+
+        Returns:
+            (frames, errors) like _download.
+        """
+        led, joined = self._claim(provider, tickers, window)
+        frames, errors = {}, {}
+
+        if led:
+            try:
+                self._throttle(provider)
+                fetched = provider.fetch(list(led), **window)
+                for ticker, (_, flight) in led.items():
+                    frames[ticker] = fetched.get(ticker, pd.DataFrame())
+                    flight.resolve(frames[ticker])
+            except Exception as e:
+                self._bump("errors")
+                for ticker, (_, flight) in led.items():
+                    errors[ticker] = e
+                    flight.resolve(error=e)
+            finally:
+                self._release(led)
+
+        for ticker, flight in joined.items():
+            try:
+                frames[ticker] = flight.wait(FETCH_TIMEOUT)
+            except Exception as e:
+                errors[ticker] = e
+
+        return frames, errors
+
+    def metrics(self) -> dict:
+        """Counters since start-up, plus the number of fetches in flight right now."""
+        with self._lock:
+            return {**self._metrics, "in_flight": len(self._inflight)}
+
+
+_fetch_scheduler = FetchScheduler()
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    return _fetch_scheduler
+
+
+def set_fetch_scheduler(scheduler: FetchScheduler) -> None:
+    global _fetch_scheduler
+    _fetch_scheduler = scheduler
+
+
+def _download_with_retry(provider: PriceProvider, ticker: str, deadline: float, **window) -> pd.DataFrame:
+    """
+    Fetch one ticker with exponential-backoff retries, giving up once
+    `deadline` seconds have passed since the first attempt.
+    """
+    started = time.monotonic()
+    delay = FETCH_BACKOFF
+
+    with span("fetch.ticker", ticker=ticker) as timing:
+        for attempt in range(1, FETCH_RETRIES + 1):
+            timing["attempts"] = attempt
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+
+            try:
+                return _fetch_scheduler.fetch_one(provider, ticker, timeout=remaining, **window)
+
+            except Exception as e:
+                if attempt == FETCH_RETRIES:
+                    raise
+                print(f"Warning: Attempt {attempt} for {ticker} failed, retrying: {str(e)}")
+
+            time.sleep(min(delay, max(deadline - (time.monotonic() - started), 0)))
+            delay *= 2
+
+        raise TimeoutError(f"Gave up on {ticker} after {deadline:.0f}s")
+
+
+def _download_concurrent(
+    provider: PriceProvider,
+    tickers: list,
+    max_workers: int,
+    deadline: float = FETCH_TIMEOUT,
+    **window
+):
+    """
+    Fetch tickers on a bounded thread pool.
+
+    Wall time is capped at one per-ticker deadline per "wave" of workers, so a
+    stalled request never holds up the others; whatever has not finished by
+    then is reported as a timeout.
+    """
+    frames, errors = {}, {}
+    workers = max(1, min(max_workers, len(tickers)))
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        futures = {
+            executor.submit(bind(_download_with_retry), provider, ticker, deadline, **window): ticker
+            for ticker in tickers
+        }
+        waves = math.ceil(len(tickers) / workers)
+        done, not_done = wait(futures, timeout=deadline * waves + 1)
+
+        for future in done:
+            ticker = futures[future]
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = e
+
+        for future in not_done:
+            errors[futures[future]] = TimeoutError(f"No response within {deadline:.0f}s")
+
+    finally:
+        # Don't block on stalled requests; they are abandoned, not joined
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return frames, errors
+
+
+def _download(
+    provider: PriceProvider,
+    tickers: list,
+    fetch_mode: str,
+    max_workers: int = FETCH_MAX_WORKERS,
+    **window
+):
+    """
+    Download `tickers` using the requested fetch mode.
+
+    Returns:
+        (frames, errors) where frames maps ticker -> DataFrame and errors maps
+        ticker -> the exception raised while fetching it.
+    """
+    frames, errors = {}, {}
+
+    if fetch_mode == "batch":
+        with span("fetch.batch", tickers=len(tickers)):
+            return _fetch_scheduler.fetch(provider, tickers, **window)
+
+    if fetch_mode == "concurrent":
+        return _download_concurrent(provider, tickers, max_workers, **window)
+
+    for ticker in tickers:
+        with span("fetch.ticker", ticker=ticker):
+            try:
+                frames[ticker] = _fetch_scheduler.fetch_one(provider, ticker, **window)
+            except Exception as e:
+                errors[ticker] = e
+
+    return frames, errors
+
+
+def _fetch_frames(
+    provider: PriceProvider,
+    tickers: list,
+    period: str,
+    fetch_mode: str,
+    cache,
+    max_workers: int = FETCH_MAX_WORKERS
+):
+    """Fetch `tickers`, serving from and topping up `cache` when one is given."""
+    if cache is None:
+        return _download(provider, tickers, fetch_mode, max_workers, period=period)
+
+    start = period_start(period)
+    frames, errors = {}, {}
+    cached, full, topup = {}, [], {}
+
+    for ticker in tickers:
+        cached[ticker] = cache.read(ticker)
+        plan = cache.plan(ticker, start, cached[ticker])
+        if plan is None:
+            frames[ticker] = cached[ticker]
+            count("disk_cache.hit")
+        elif plan[0] == "full":
+            full.append(ticker)
+            count("disk_cache.miss")
+        else:
+            topup[ticker] = plan[1]
+            count("disk_cache.topup")
+
+    fetched = {}
+    if full:
+        f, e = _download(provider, full, fetch_mode, max_workers, period=period)
+        fetched.update(f)
+        errors.update(e)
+    if topup:
+        f, e = _download(provider, list(topup), fetch_mode, max_workers, start=min(topup.values()))
+        fetched.update(f)
+        errors.update(e)
+
+    for ticker, df in fetched.items():
+        if not df.empty:
+            frames[ticker] = cache.merge(ticker, cached[ticker], df)
+            if start is None and ticker in full:
+                cache.mark_full_history(ticker)
+        elif ticker in topup:
+            # Nothing new since the last bar (e.g. a market holiday)
+            cache.touch(ticker)
+            frames[ticker] = cached[ticker]
+        else:
+            frames[ticker] = df
+
+    for ticker in list(errors):
+        if cached.get(ticker) is not None and not cached[ticker].empty:
+            print(f"Warning: Using cached data for {ticker} after fetch failed: {str(errors.pop(ticker))}")
+            count("disk_cache.stale")
+            frames[ticker] = cached[ticker]
+
+    if start is not None:
+        frames = {ticker: df[df.index >= start] for ticker, df in frames.items()}
+
+    return frames, errors
+
 
 def load_price_data(
     sectors: dict,
     benchmark: str,
-    period: str = "6mo"
+    period: str = "6mo",
+    fetch_mode: str = "batch",
+    use_cache: bool = True,
+    max_workers: int = FETCH_MAX_WORKERS,
+    provider: PriceProvider = None
 ) -> dict:
     """
     Fetch adjusted close price data for sectors + benchmark.
@@ -29,6 +597,14 @@ def load_price_data(
         sectors: Dictionary mapping sector names to tickers, e.g., {"IT": "^CNXIT", "Bank": "^NSEBANK"}
         benchmark: Benchmark ticker symbol, e.g., "^NSEI"
         period: Time period for data, e.g., "6mo"
+        fetch_mode: "batch" fetches the benchmark and every sector in one bulk
+            request; "serial" issues one request per ticker; "concurrent"
+            fetches tickers in parallel with retries and a per-ticker deadline
+        use_cache: Serve prices from the on-disk cache and only fetch the
+            trading dates it is missing (only for providers marked cacheable)
+        max_workers: Upper bound on parallel requests in "concurrent" mode
+        provider: Price source; defaults to get_default_provider() (Yahoo
+            Finance unless RRG_PRICE_PROVIDER says otherwise)
 
     Returns:
         Dictionary with benchmark and sector DataFrames:
@@ -39,28 +615,72 @@ def load_price_data(
             ...
         }
     """
+    # Several sectors may share a ticker (e.g. the PSU Bank fallback), so dedupe
+    tickers = list(dict.fromkeys([benchmark, *sectors.values()]))
+    frames, errors = fetch_price_frames(tickers, period, fetch_mode, use_cache, max_workers, provider)
+    return assemble_price_data(sectors, benchmark, frames, errors)
 
-    data = {}
 
-    # --- Benchmark ---
-    try:
-        benchmark_df = yf.download(
-            benchmark,
-            period=period,
-            progress=False,
-            auto_adjust=True
-        )
+def load_price_panel(
+    sectors: dict,
+    benchmark: str,
+    period: str = "6mo",
+    dtype="float64",
+    **load_kwargs
+) -> PricePanel:
+    """
+    load_price_data packed into a close-only PricePanel.
 
-        # Handle MultiIndex columns if present
-        if isinstance(benchmark_df.columns, pd.MultiIndex):
-            benchmark_df.columns = benchmark_df.columns.droplevel(1)
+    Only closes are kept in memory; the other OHLCV fields are re-read through
+    load_price_data (the on-disk cache, for cacheable providers) the first
+    time PricePanel.field() asks for them. Takes the same keyword arguments
+    as load_price_data.
+    """
+    loader = partial(load_price_data, sectors, benchmark, period, **load_kwargs)
+    return PricePanel.from_frames(loader(), dtype, fields_loader=loader)
+
+
+def fetch_price_frames(
+    tickers: list,
+    period: str = "6mo",
+    fetch_mode: str = "batch",
+    use_cache: bool = True,
+    max_workers: int = FETCH_MAX_WORKERS,
+    provider: PriceProvider = None
+):
+    """
+    Ticker-level half of load_price_data: fetch without validating.
+
+    Returns:
+        (frames, errors) keyed by ticker; see load_price_data for the arguments.
+    """
+    if fetch_mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch_mode {fetch_mode!r}. Expected one of {FETCH_MODES}")
+
+    provider = provider or get_default_provider()
+    cache = _price_cache if use_cache and provider.cacheable else None
+
+    with span("fetch", tickers=len(tickers), mode=fetch_mode, provider=type(provider).__name__) as timing:
+        frames, errors = _fetch_frames(provider, tickers, period, fetch_mode, cache, max_workers)
+        timing["errors"] = len(errors)
+    return frames, errors
 
-        if benchmark_df.empty:
-            raise ValueError(f"No data returned for benchmark {benchmark}")
 
-        if "Close" not in benchmark_df.columns:
-            raise ValueError(f"Benchmark data missing Close column. Available columns: {benchmark_df.columns.tolist()}")
+def assemble_price_data(sectors: dict, benchmark: str, frames: dict, errors: dict) -> dict:
+    """
+    Sector-level half of load_price_data: turn per-ticker frames into the
+    {benchmark, sector...} dict, raising for a bad benchmark and warning about
+    and skipping bad sectors.
+    """
+    data = {}
 
+    # --- Benchmark ---
+    try:
+        if benchmark in errors:
+            raise errors[benchmark]
+
+        benchmark_df = frames.get(benchmark, pd.DataFrame())
+        _validate_benchmark(benchmark_df, benchmark)
         data[benchmark] = benchmark_df
 
     except Exception as e:
@@ -68,33 +688,146 @@ def load_price_data(
 
     # --- Sector data ---
     for sector, ticker in sectors.items():
-        try:
-            df = yf.download(
-                ticker,
-                period=period,
-                progress=False,
-                auto_adjust=True
-            )
-
-            # Handle MultiIndex columns if present
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.droplevel(1)
-
-            if df.empty:
-                print(f"Warning: No data returned for sector {sector} ({ticker})")
-                continue
-
-            if "Close" not in df.columns:
-                print(f"Warning: Sector {sector} data missing Close column. Available columns: {df.columns.tolist()}")
-                continue
+        if ticker in errors:
+            print(f"Warning: Failed to load data for sector {sector} ({ticker}): {str(errors[ticker])}")
+            continue
 
-            data[sector] = df
+        df = frames.get(ticker, pd.DataFrame())
 
-        except Exception as e:
-            print(f"Warning: Failed to load data for sector {sector} ({ticker}): {str(e)}")
+        if not _validate_sector(df, sector, ticker):
             continue
 
+        # Copy so sectors sharing a ticker don't alias one another
+        data[sector] = df.copy()
+
     if len(data) <= 1:  # Only benchmark, no sectors
         raise ValueError("No sector data could be loaded. Please check your internet connection and try again.")
 
     return data
+
+
+def resample_prices(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Roll daily OHLCV bars up into weekly or monthly bars.
+
+    Each bar is labelled with the last trading date it contains, so the
+    current, still-open week or month carries the latest close. Buckets with
+    no trading days (e.g. a holiday week) are dropped.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe {timeframe!r}. Expected one of {tuple(TIMEFRAMES)}")
+
+    rule = TIMEFRAMES[timeframe]
+    if rule is None or df.empty:
+        return df
+
+    bars = df.resample(rule).agg({col: BAR_AGGREGATION.get(col, "last") for col in df.columns})
+    last_dates = df.index.to_series().resample(rule).last()
+
+    traded = last_dates.notna().to_numpy()
+    bars = bars[traded]
+    bars.index = pd.DatetimeIndex(last_dates[traded], name=df.index.name)
+    return bars
+
+
+def resample_price_data(data: dict, timeframe: str) -> dict:
+    """resample_prices applied to every frame of a load_price_data result."""
+    return {key: resample_prices(df, timeframe) for key, df in data.items()}
+
+
+def required_bars(rs_period: int, roc_period: int, tail_length: int, tolerance: float = EWM_TOLERANCE) -> int:
+    """
+    Bars of history after which the RRG tail no longer depends on where the
+    history starts, to within `tolerance`.
+
+    The adjust=False EMA is seeded with the first ratio, whose weight after
+    n bars is (1 - alpha) ** n, so the warm-up is the smallest n with that
+    below `tolerance`. The oldest tail point's ROC look-back must itself be
+    warmed up, so roc_period + tail_length bars come on top.
+
+    Returns:
+        Number of bars, or None (the whole history) when tolerance <= 0.
+    """
+    if tolerance <= 0:
+        return None
+
+    alpha = 2.0 / (rs_period + 1)
+    warmup = math.ceil(math.log(tolerance) / math.log(1 - alpha)) if alpha < 1 else 0
+    return warmup + roc_period + tail_length
+
+
+def history_period(bars: int, timeframe: str = "daily") -> str:
+    """Shortest period in HISTORY_PERIODS holding `bars` bars of `timeframe` ("max" for None)."""
+    if bars is None:
+        return "max"
+
+    now = pd.Timestamp.now().normalize()
+    needed = pd.Timedelta(days=365.25 * HISTORY_SLACK * bars / BARS_PER_YEAR[timeframe])
+    for period in HISTORY_PERIODS[:-1]:
+        if now - period_start(period, now) >= needed:
+            return period
+    return "max"
+
+
+def rrg_window(rs_period: int, roc_period: int, tail_length: int, timeframe: str = "daily", tolerance: float = EWM_TOLERANCE):
+    """
+    History an RRG with these parameters needs.
+
+    Returns:
+        (bars, period): bars of `timeframe` to keep (see required_bars) and
+        the daily period to fetch for them.
+    """
+    bars = required_bars(rs_period, roc_period, tail_length, tolerance)
+    return bars, history_period(bars, timeframe)
+
+
+def trim_history(data, bars: int):
+    """
+    Keep the last `bars` dates of a load_price_data dict or PricePanel, so
+    the compute layer never touches history that cannot change its result.
+    Keys with no bars in that window (stale or delisted tickers) are dropped
+    with a warning. A no-op for bars=None or a shorter history.
+    """
+    if bars is None:
+        return data
+    if isinstance(data, PricePanel):
+        panel = data.tail(bars)
+        if panel is data:
+            return data
+        traded = ~np.isnan(panel.closes).all(axis=0)
+        for key in np.asarray(panel.columns, dtype=object)[~traded]:
+            print(f"Warning: Skipping {key}: no bars in the last {bars}")
+        return panel if traded.all() else panel.select([key for key, ok in zip(panel.columns, traded) if ok])
+
+    dates = np.unique(np.concatenate([df.index.to_numpy() for df in data.values()]))
+    if len(dates) <= bars:
+        return data
+    start = dates[-bars]
+    trimmed = {}
+    for key, df in data.items():
+        df = df[df.index >= start]
+        if df.empty:
+            print(f"Warning: Skipping {key}: no bars in the last {bars}")
+            continue
+        trimmed[key] = df
+    return trimmed
+
+
+def _validate_benchmark(df: pd.DataFrame, benchmark: str) -> None:
+    if df.empty:
+        raise ValueError(f"No data returned for benchmark {benchmark}")
+
+    if "Close" not in df.columns:
+        raise ValueError(f"Benchmark data missing Close column. Available columns: {df.columns.tolist()}")
+
+
+def _validate_sector(df: pd.DataFrame, sector: str, ticker: str) -> bool:
+    if df.empty:
+        print(f"Warning: No data returned for sector {sector} ({ticker})")
+        return False
+
+    if "Close" not in df.columns:
+        print(f"Warning: Sector {sector} data missing Close column. Available columns: {df.columns.tolist()}")
+        return False
+
+    return True
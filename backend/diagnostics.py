@@ -0,0 +1,200 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+logger = logging.getLogger("rrg.diagnostics")
+
+# Spans kept for the diagnostics panel; older ones are dropped
+MAX_SPANS = 5000
+
+_enabled = os.environ.get("RRG_DIAGNOSTICS", "").lower() in ("1", "true", "yes")
+_spans = deque(maxlen=MAX_SPANS)
+_counters = {}
+_lock = threading.Lock()
+
+
+class Collector:
+    """Spans and counters of one run (e.g. one Streamlit rerun), kept apart from every other run."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            self.spans.append(entry)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """(spans, counters) recorded so far; see the module-level snapshot."""
+        with self._lock:
+            return list(self.spans), dict(self.counters)
+
+
+# Collector of the current run; a context variable, so concurrent sessions never share one
+_collector = contextvars.ContextVar("rrg_diagnostics_collector", default=None)
+
+
+class _Span:
+    """Times a `with` block and records it on exit; the yielded dict takes extra fields."""
+
+    __slots__ = ("stage", "fields", "started")
+
+    def __init__(self, stage: str, fields: dict):
+        self.stage = stage
+        self.fields = fields
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        record(self.stage, time.perf_counter() - self.started, **self.fields)
+        return False
+
+
+class _NullSpan:
+    """Stand-in used while diagnostics are off, so instrumented code costs one branch."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _ensure_handler() -> None:
+    """Send log lines to stderr unless the application configured the logger itself."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def enable(flag: bool = True) -> None:
+    """Turn span recording on or off (RRG_DIAGNOSTICS=1 sets the default)."""
+    global _enabled
+    _enabled = bool(flag)
+    if _enabled:
+        _ensure_handler()
+
+
+def is_enabled() -> bool:
+    return _enabled or _collector.get() is not None
+
+
+def collect(flag: bool = True):
+    """
+    Record the spans of the current context (thread or task) in a new Collector.
+
+    Unlike enable, this leaves process-wide state alone: each Streamlit
+    session calls it at the top of its run and only sees its own spans.
+    Calling it again (or with flag False) ends the previous collection.
+
+    Returns:
+        The Collector, or None when `flag` is false.
+    """
+    collector = Collector() if flag else None
+    _collector.set(collector)
+    if collector is not None:
+        _ensure_handler()
+    return collector
+
+
+def bind(fn):
+    """`fn` set to run in a copy of the calling context, so worker threads record into its collector."""
+    return partial(contextvars.copy_context().run, fn)
+
+
+def span(stage: str, **fields):
+    """
+    Context manager timing one stage, e.g.
+
+        with span("fetch", tickers=12) as s:
+            ...
+            s["bytes"] = len(payload)
+
+    Fields given here or set on the yielded dict are stored with the span and
+    written to the "rrg.diagnostics" logger as one JSON line. A no-op unless
+    diagnostics are enabled or a collector is active (see collect).
+    """
+    if not _enabled and _collector.get() is None:
+        return _NULL_SPAN
+    return _Span(stage, fields)
+
+
+def record(stage: str, seconds: float, **fields) -> None:
+    """Record an already-measured span (see span)."""
+    collector = _collector.get()
+    if not _enabled and collector is None:
+        return
+
+    entry = {"stage": stage, "ms": round(seconds * 1000, 3), **fields}
+    if collector is not None:
+        collector.add(entry)
+    if _enabled:
+        with _lock:
+            _spans.append(entry)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(entry, default=str))
+
+
+def count(name: str, n: int = 1) -> None:
+    """Bump a named counter, e.g. "disk_cache.hit"."""
+    collector = _collector.get()
+    if collector is not None:
+        collector.count(name, n)
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """
+    Copy of what has been recorded process-wide (while enabled) since the last reset.
+
+    Returns:
+        (spans, counters): a list of span dicts (stage, ms and any extra
+        fields) in completion order, and a dict of counter values
+    """
+    with _lock:
+        return list(_spans), dict(_counters)
+
+
+def summarize(spans) -> list:
+    """Aggregate spans per stage into rows of stage, calls, total_ms and max_ms."""
+    rows = {}
+    for entry in spans:
+        row = rows.setdefault(entry["stage"], {"stage": entry["stage"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        row["calls"] += 1
+        row["total_ms"] += entry["ms"]
+        row["max_ms"] = max(row["max_ms"], entry["ms"])
+    return list(rows.values())
+
+
+def reset() -> None:
+    """Forget recorded spans and counters."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+if _enabled:
+    _ensure_handler()
@@ -0,0 +1,291 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from backend.alerts import QuadrantAlerts
+from backend.data import TIMEFRAMES, assemble_price_data, fetch_price_frames, resample_price_data, resample_prices
+from backend.diagnostics import span
+from backend.panel import PricePanel
+from backend.replay import RRGReplay
+from backend.rrg import rrg_history, rrg_sweep, tails_to_frame
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl` seconds after
+    they were stored. Keeps hit/miss counters for diagnostics.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Layer 1: OHLCV frames per (ticker, period)
+PRICE_MEMO = TTLCache(maxsize=2048, ttl=15 * 60)
+
+# Layer 2: RRG tails per (sector, price versions, rs_period, roc_period)
+SERIES_MEMO = TTLCache(maxsize=200_000, ttl=15 * 60)
+
+# Weekly/monthly bars per (key, price version, timeframe)
+TIMEFRAME_MEMO = TTLCache(maxsize=4096, ttl=15 * 60)
+
+# Full-history replays per (price versions, rs_period, roc_period)
+REPLAY_MEMO = TTLCache(maxsize=32, ttl=15 * 60)
+
+# Quadrant-transition engines per (keys, rs_period, roc_period); extended as bars arrive
+ALERT_MEMO = TTLCache(maxsize=32, ttl=15 * 60)
+
+
+def memo_price_data(sectors: dict, benchmark: str, period: str = "6mo", **load_kwargs) -> dict:
+    """
+    load_price_data with a per-ticker in-memory layer in front of it.
+
+    Only tickers not already held in PRICE_MEMO are fetched, so toggling one
+    sector never re-fetches the others. Takes the same arguments as
+    load_price_data.
+    """
+    tickers = list(dict.fromkeys([benchmark, *sectors.values()]))
+    frames = {}
+    for ticker in tickers:
+        df = PRICE_MEMO.get((ticker, period))
+        if df is not None:
+            frames[ticker] = df
+
+    missing = [ticker for ticker in tickers if ticker not in frames]
+    errors = {}
+    if missing:
+        fetched, errors = fetch_price_frames(missing, period, **load_kwargs)
+        for ticker, df in fetched.items():
+            if not df.empty:
+                PRICE_MEMO.set((ticker, period), df)
+        frames.update(fetched)
+
+    return assemble_price_data(sectors, benchmark, frames, errors)
+
+
+def memo_price_panel(sectors: dict, benchmark: str, period: str = "6mo", dtype="float64", **load_kwargs) -> PricePanel:
+    """
+    memo_price_data packed into a close-only PricePanel.
+
+    Other OHLCV fields are served on demand from the same memoized frames.
+    """
+    loader = partial(memo_price_data, sectors, benchmark, period, **load_kwargs)
+    return PricePanel.from_frames(loader(), dtype, fields_loader=loader)
+
+
+def _version(df):
+    """Cheap fingerprint of a price frame, so refreshed prices get new series keys."""
+    close = df["Close"]
+    return (len(close), close.index[0], close.index[-1], float(close.iloc[-1]))
+
+
+def _versions(data) -> dict:
+    """_version of every entry of a load_price_data dict or PricePanel."""
+    if isinstance(data, PricePanel):
+        return {key: data.fingerprint(key) for key in data}
+    return {key: _version(df) for key, df in data.items()}
+
+
+def memo_timeframe(data: dict, timeframe: str) -> dict:
+    """
+    resample_price_data backed by TIMEFRAME_MEMO.
+
+    Bars are derived from the daily frames already in `data`, so switching
+    timeframe never fetches; each frame is resampled once per price version.
+    """
+    if TIMEFRAMES.get(timeframe, "") is None:
+        return data
+
+    bars = {}
+    for key, version in _versions(data).items():
+        cache_key = (key, version, timeframe)
+        resampled = TIMEFRAME_MEMO.get(cache_key)
+        if resampled is None:
+            resampled = resample_prices(data[key], timeframe)
+            TIMEFRAME_MEMO.set(cache_key, resampled)
+        bars[key] = resampled
+
+    if isinstance(data, PricePanel):
+        loader = partial(_resampled_fields, data.fields_loader, timeframe) if data.fields_loader else None
+        return PricePanel.from_frames(bars, data.dtype, fields_loader=loader)
+    return bars
+
+
+def _resampled_fields(loader, timeframe):
+    return resample_price_data(loader(), timeframe)
+
+
+def memo_rrg(
+    data: dict,
+    rs_period: int,
+    roc_period: int,
+    tail_length: int,
+    benchmark: str = "^NSEI",
+    rs_periods=None,
+    roc_periods=None,
+    max_tail: int = None,
+    fill: str = "none",
+    fill_limit: int = None
+):
+    """
+    calculate_rrg backed by SERIES_MEMO.
+
+    Tails are cached per (benchmark, sector) and (rs_period, roc_period),
+    `max_tail` long, and `tail_length` is applied as a slice on top. On a miss
+    the missing sectors are computed with rrg_sweep over `rs_periods` x
+    `roc_periods` (just the requested pair when omitted), so neighbouring
+    slider positions are filled in the same pass. `benchmark` may be a list,
+    as for calculate_rrg, and `fill` / `fill_limit` pick the missing-bar
+    policy (see align_prices).
+    """
+    max_tail = max(max_tail or tail_length, tail_length)
+    rs_periods = list(rs_periods or [rs_period])
+    roc_periods = list(roc_periods or [roc_period])
+    benchmarks = [benchmark] if isinstance(benchmark, str) else list(benchmark)
+    versions = _versions(data)
+
+    sectors = [sector for sector in data if sector not in benchmarks]
+    pairs = [(b, sector) for b in benchmarks for sector in sectors]
+    keys = {
+        (b, sector): (sector, versions[sector], b, versions[b], max_tail, fill, fill_limit)
+        for b, sector in pairs
+    }
+
+    tails = {}
+    for pair in pairs:
+        entry = SERIES_MEMO.get(keys[pair] + (rs_period, roc_period))
+        if entry is not None:
+            tails[pair] = entry
+
+    missing = list(dict.fromkeys(sector for b, sector in pairs if (b, sector) not in tails))
+    if missing:
+        with span("rrg_sweep", sectors=len(missing), grid=len(rs_periods) * len(roc_periods)):
+            if isinstance(data, PricePanel):
+                subset = data.select([*benchmarks, *missing])
+            else:
+                subset = {key: data[key] for key in [*benchmarks, *missing]}
+            sweep = rrg_sweep(subset, rs_periods, roc_periods, max_tail, benchmark, fill=fill, fill_limit=fill_limit)
+        columns = [(b, sector) for b in benchmarks for sector in sweep.sectors]
+        for j, pair in enumerate(columns):
+            for i, rs in enumerate(sweep.rs_periods):
+                for k, roc in enumerate(sweep.roc_periods):
+                    SERIES_MEMO.set(
+                        keys[pair] + (rs, roc),
+                        (sweep.rs_ratio[i, k, j], sweep.rs_momentum[i, k, j])
+                    )
+            i, k = sweep.rs_periods.index(rs_period), sweep.roc_periods.index(roc_period)
+            tails[pair] = (sweep.rs_ratio[i, k, j], sweep.rs_momentum[i, k, j])
+
+    # Layer 3: tail_length is just a view on the cached tails
+    rs_ratio = np.column_stack([tails[pair][0] for pair in pairs])
+    rs_momentum = np.column_stack([tails[pair][1] for pair in pairs])
+    df = tails_to_frame(sectors, rs_ratio, rs_momentum, tail_length, None if isinstance(benchmark, str) else benchmarks)
+
+    if df.empty:
+        raise ValueError("No valid sector data found. Please check your data sources and try again.")
+    return df
+
+
+def memo_replay(
+    data: dict,
+    rs_period: int,
+    roc_period: int,
+    benchmark: str = "^NSEI",
+    fill: str = "none",
+    fill_limit: int = None
+) -> RRGReplay:
+    """RRGReplay built once per price versions and parameters, then reused."""
+    key = (tuple(_versions(data).items()), benchmark, rs_period, roc_period, fill, fill_limit)
+    replay = REPLAY_MEMO.get(key)
+    if replay is None:
+        with span("replay.build", sectors=len(data) - 1):
+            replay = RRGReplay(data, rs_period, roc_period, benchmark, fill=fill, fill_limit=fill_limit)
+        REPLAY_MEMO.set(key, replay)
+    return replay
+
+
+def memo_alerts(
+    data: dict,
+    rs_period: int,
+    roc_period: int,
+    benchmark: str = "^NSEI",
+    fill: str = "none",
+    fill_limit: int = None
+) -> QuadrantAlerts:
+    """
+    QuadrantAlerts for `data`, kept across reruns.
+
+    When the prices only gained newer bars, the cached engine is extended
+    with those bars instead of being rebuilt, so earlier events are kept and
+    only the new rows are classified.
+    """
+    versions = _versions(data)
+    key = (tuple(versions), benchmark, rs_period, roc_period, fill, fill_limit)
+    entry = ALERT_MEMO.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+
+    with span("alerts", sectors=len(data) - 1) as timing:
+        rs_ratio, rs_momentum = rrg_history(data, rs_period, roc_period, benchmark, fill=fill, fill_limit=fill_limit)
+        if entry is not None and rs_ratio.index[-1] > entry[1].last_date:
+            alerts = entry[1]
+            timing["new_events"] = len(alerts.extend(rs_ratio, rs_momentum))
+        else:
+            alerts = QuadrantAlerts.from_history(rs_ratio, rs_momentum)
+    ALERT_MEMO.set(key, (versions, alerts))
+    return alerts
+
+
+def memo_stats() -> list:
+    """Hit/miss counters and current size of each in-memory layer."""
+    return [
+        {"layer": name, "hits": cache.hits, "misses": cache.misses, "entries": len(cache)}
+        for name, cache in (
+            ("prices", PRICE_MEMO), ("timeframes", TIMEFRAME_MEMO), ("series", SERIES_MEMO), ("replay", REPLAY_MEMO),
+            ("alerts", ALERT_MEMO)
+        )
+    ]
+
+
+def clear_memo() -> None:
+    """Drop every in-memory layer (the on-disk price cache is left alone)."""
+    PRICE_MEMO.clear()
+    TIMEFRAME_MEMO.clear()
+    SERIES_MEMO.clear()
+    REPLAY_MEMO.clear()
+    ALERT_MEMO.clear()
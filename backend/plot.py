@@ -0,0 +1,410 @@
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from backend.diagnostics import record
+
+
+# Color palette for sectors (distinct colors)
+COLOR_PALETTE = [
+    '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+    '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
+    '#aec7e8', '#ffbb78', '#98df8a', '#ff9896', '#c5b0d5'
+]
+
+# Above this many points, or this many sectors (each adds an arrow and a
+# label annotation), plot_rrg switches to WebGL (Scattergl) rendering
+WEBGL_POINT_THRESHOLD = 1000
+WEBGL_SECTOR_THRESHOLD = 50
+
+
+def _rgba(hex_color, alpha):
+    """'#1f77b4', 0.6 -> 'rgba(31, 119, 180, 0.6)'"""
+    r, g, b = (int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, {alpha})"
+
+
+def _add_layout(fig):
+    # Axis lock (reference style) with gridlines
+    fig.update_xaxes(
+        range=[90, 110],
+        title="JdK RS-Ratio",
+        zeroline=False,
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        griddash='dot'
+    )
+    fig.update_yaxes(
+        range=[88, 112],
+        title="JdK RS-Momentum",
+        zeroline=False,
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        griddash='dot'
+    )
+
+    # Quadrant backgrounds
+    quadrants = [
+        dict(x0=90, x1=100, y0=100, y1=112, fillcolor="#e8ecff"),  # Improving
+        dict(x0=100, x1=110, y0=100, y1=112, fillcolor="#e9f7e6"), # Leading
+        dict(x0=90, x1=100, y0=88, y1=100, fillcolor="#fde8e8"),  # Lagging
+        dict(x0=100, x1=110, y0=88, y1=100, fillcolor="#fff4db"), # Weakening
+    ]
+
+    for q in quadrants:
+        fig.add_shape(type="rect", line=dict(width=0), layer="below", **q)
+
+    # Center lines
+    fig.add_shape(type="line", x0=100, x1=100, y0=88, y1=112, line=dict(color="black", width=1))
+    fig.add_shape(type="line", x0=90, x1=110, y0=100, y1=100, line=dict(color="black", width=1))
+
+    # Quadrant labels
+    quadrant_labels = [
+        dict(x=92, y=110, text="Improving", showarrow=False, font=dict(size=14, color="gray")),
+        dict(x=108, y=110, text="Leading", showarrow=False, font=dict(size=14, color="gray")),
+        dict(x=92, y=90, text="Lagging", showarrow=False, font=dict(size=14, color="gray")),
+        dict(x=108, y=90, text="Weakening", showarrow=False, font=dict(size=14, color="gray")),
+    ]
+
+    fig.update_layout(annotations=quadrant_labels)
+
+
+def _arrow_and_label(sector, x_vals, y_vals, sector_color):
+    """Arrow and label annotation dicts for the head of one sector's tail."""
+    # Calculate arrow direction - use last 2 points for most accurate direction
+    dx = x_vals[-1] - x_vals[-2]
+    dy = y_vals[-1] - y_vals[-2]
+
+    # Only use 3 points if movement is very small (to avoid jitter)
+    movement_magnitude = np.sqrt(dx**2 + dy**2)
+    if movement_magnitude < 0.5 and len(x_vals) >= 3:
+        dx = x_vals[-1] - x_vals[-3]
+        dy = y_vals[-1] - y_vals[-3]
+
+    # Arrow annotation (this stays intact during zoom)
+    # Arrow points from second-to-last to last position
+    arrow = dict(
+        x=x_vals[-1],
+        y=y_vals[-1],
+        ax=x_vals[-2],
+        ay=y_vals[-2],
+        xref='x',
+        yref='y',
+        axref='x',
+        ayref='y',
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1.5,
+        arrowwidth=3,
+        arrowcolor=sector_color,
+        opacity=0.8
+    )
+
+    # Position label very close to arrow tip, slightly offset to avoid overlap
+    # Use a small offset perpendicular to arrow direction for better readability
+    offset_distance = 1.2
+    angle = np.arctan2(dy, dx)  # Calculate angle from movement direction
+
+    # Offset slightly perpendicular to arrow direction
+    perpendicular_angle = angle + np.pi/4  # 45 degrees offset
+    label_offset_x = offset_distance * np.cos(perpendicular_angle)
+    label_offset_y = offset_distance * np.sin(perpendicular_angle)
+
+    label = dict(
+        x=x_vals[-1] + label_offset_x,
+        y=y_vals[-1] + label_offset_y,
+        text=f"<b>{sector}</b>",
+        showarrow=False,
+        font=dict(size=9, color=sector_color, family="Arial", weight="bold"),
+        bgcolor="rgba(255, 255, 255, 0.95)",
+        bordercolor=sector_color,
+        borderwidth=1,
+        borderpad=2,
+        xanchor="center",
+        yanchor="middle"
+    )
+    return arrow, label
+
+
+# Head (latest point) marker and hover text, shared by both renderers
+_HEAD_MARKER = dict(symbol="circle", size=10, line=dict(width=2, color="white"))
+_HEAD_HOVER = "RS-Ratio: %{x:.2f}<br>RS-Momentum: %{y:.2f}<br><extra></extra>"
+
+
+def _tail_style(n_points):
+    """Marker size/opacity gradient for a tail of n_points (older = smaller, fainter)."""
+    steps = np.arange(n_points) / n_points
+    return 4 + steps * 4, 0.4 + steps * 0.4   # sizes 4 -> 8, opacity 0.4 -> 0.8
+
+
+def _add_tails_svg(fig, tails, sector_colors):
+    """
+    Per sector, one lines+markers tail trace and a head trace that is its
+    legend entry; both share a legendgroup, so clicking the sector in the
+    legend hides the whole sector. Arrow and label annotations on top.
+    """
+    annotations = []
+    for sector, (x_vals, y_vals) in tails.items():
+        sector_color = sector_colors[sector]
+        sizes, opacities = _tail_style(len(x_vals) - 1)
+
+        fig.add_trace(go.Scatter(
+            x=x_vals[:-1],
+            y=y_vals[:-1],
+            mode="lines+markers",
+            line=dict(width=3, color=_rgba(sector_color, 0.6)),
+            marker=dict(
+                size=sizes,
+                opacity=opacities,
+                color=sector_color,
+                line=dict(width=1, color="white")
+            ),
+            name=sector,
+            legendgroup=sector,
+            showlegend=False,
+            hoverinfo="skip"
+        ))
+        fig.add_trace(go.Scatter(
+            x=x_vals[-1:],
+            y=y_vals[-1:],
+            mode="markers",
+            marker=_HEAD_MARKER | dict(color=sector_color),
+            name=sector,
+            legendgroup=sector,
+            hovertemplate=f"<b>{sector}</b><br>" + _HEAD_HOVER
+        ))
+
+        annotations.extend(_arrow_and_label(sector, x_vals, y_vals, sector_color))
+
+    # One layout update: every add_annotation call re-validates the whole list
+    fig.update_layout(annotations=[*fig.layout.annotations, *annotations])
+
+
+def _add_tails_webgl(fig, tails, sector_colors):
+    """
+    Large-universe tails: one Scattergl line trace per palette colour (tails
+    separated by gaps), a single Scattergl trace for every tail marker and
+    one for every head. Annotations and the per-sector legend are skipped;
+    hundreds of them are what makes SVG charts crawl.
+    """
+    lines = {}
+    marker_x, marker_y, sizes, opacities, colors = [], [], [], [], []
+
+    for sector, (x_vals, y_vals) in tails.items():
+        sector_color = sector_colors[sector]
+        line_x, line_y = lines.setdefault(sector_color, ([], []))
+        line_x.extend([*x_vals, None])
+        line_y.extend([*y_vals, None])
+
+        size, opacity = _tail_style(len(x_vals) - 1)
+        marker_x.extend(x_vals[:-1])
+        marker_y.extend(y_vals[:-1])
+        sizes.extend(size)
+        opacities.extend(opacity)
+        colors.extend([sector_color] * (len(x_vals) - 1))
+
+    for sector_color, (line_x, line_y) in lines.items():
+        fig.add_trace(go.Scattergl(
+            x=line_x,
+            y=line_y,
+            mode="lines",
+            line=dict(width=2, color=_rgba(sector_color, 0.6)),
+            connectgaps=False,
+            showlegend=False,
+            hoverinfo="skip"
+        ))
+
+    fig.add_trace(go.Scattergl(
+        x=marker_x,
+        y=marker_y,
+        mode="markers",
+        marker=dict(size=sizes, opacity=opacities, color=colors),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+
+    # Latest point of every sector (for hover and visibility) in one trace
+    fig.add_trace(go.Scattergl(
+        x=[x_vals[-1] for x_vals, _ in tails.values()],
+        y=[y_vals[-1] for _, y_vals in tails.values()],
+        mode="markers",
+        marker=_HEAD_MARKER | dict(color=[sector_colors[sector] for sector in tails]),
+        customdata=list(tails),
+        name="Latest",
+        showlegend=False,
+        hovertemplate="<b>%{customdata}</b><br>" + _HEAD_HOVER
+    ))
+
+
+def plot_rrg(
+    rrg_metrics,
+    webgl=None,
+    webgl_threshold=WEBGL_POINT_THRESHOLD,
+    webgl_sectors=WEBGL_SECTOR_THRESHOLD
+):
+    """
+    Build the RRG figure from calculate_rrg output.
+
+    Each sector's tail is a single lines+markers trace whose marker size and
+    opacity arrays carry the old-to-new gradient, plus a head trace that is
+    the sector's legend entry (toggling both), so the trace count is two per
+    sector regardless of tail length. In WebGL mode all tails and all heads
+    share a handful of traces and there is no per-sector legend.
+
+    Args:
+        rrg_metrics: DataFrame with sector, rs_ratio, rs_momentum columns
+        webgl: Force WebGL (True) or SVG (False) rendering; None switches to
+            WebGL automatically when there are more than `webgl_threshold`
+            points or more than `webgl_sectors` sectors
+        webgl_threshold: Point count above which WebGL is used
+        webgl_sectors: Sector count above which WebGL is used; SVG annotations
+            cost far more per sector than points do, even with short tails
+    """
+    started = time.perf_counter()
+    fig = go.Figure()
+
+    sectors = rrg_metrics["sector"].unique()
+    sector_colors = {sector: COLOR_PALETTE[i % len(COLOR_PALETTE)] for i, sector in enumerate(sectors)}
+    if webgl is None:
+        use_webgl = len(rrg_metrics) > webgl_threshold or len(sectors) > webgl_sectors
+    else:
+        use_webgl = webgl
+
+    _add_layout(fig)
+
+    tails = {}
+    for sector, df in rrg_metrics.groupby("sector", sort=False):
+        if len(df) < 2:
+            continue  # not enough points for tail
+        tails[sector] = (df["rs_ratio"].to_numpy(), df["rs_momentum"].to_numpy())
+
+    if use_webgl:
+        _add_tails_webgl(fig, tails, sector_colors)
+    else:
+        _add_tails_svg(fig, tails, sector_colors)
+
+    fig.update_layout(
+        height=700,
+        margin=dict(l=40, r=200, t=40, b=40),
+        plot_bgcolor="white",
+        legend=dict(
+            orientation="v",
+            yanchor="top",
+            y=1,
+            xanchor="left",
+            x=1.02,
+            bgcolor="rgba(255, 255, 255, 0.9)",
+            bordercolor="lightgray",
+            borderwidth=1,
+            font=dict(size=11)
+        ),
+        hovermode='closest',
+        hoverlabel=dict(
+            bgcolor="white",
+            font_size=12,
+            font_family="Arial",
+            namelength=-1
+        )
+    )
+
+    record("plot_rrg", time.perf_counter() - started, points=len(rrg_metrics), webgl=use_webgl)
+    return fig
+
+
+def _replay_traces(frame, sectors, sector_colors):
+    """Fixed-order traces (one tail per sector, then all heads) for one replay frame."""
+    grouped = dict(tuple(frame.groupby("sector", sort=False)))
+    traces, heads = [], []
+
+    for sector in sectors:
+        df = grouped.get(sector)
+        x_vals = df["rs_ratio"].to_numpy() if df is not None else np.empty(0)
+        y_vals = df["rs_momentum"].to_numpy() if df is not None else np.empty(0)
+        sizes, opacities = _tail_style(len(x_vals))
+
+        traces.append(go.Scatter(
+            x=x_vals,
+            y=y_vals,
+            mode="lines+markers",
+            line=dict(width=3, color=_rgba(sector_colors[sector], 0.6)),
+            marker=dict(size=sizes, opacity=opacities, color=sector_colors[sector]),
+            name=sector,
+            legendgroup=sector,
+            hoverinfo="skip"
+        ))
+        if len(x_vals):
+            heads.append((x_vals[-1], y_vals[-1], sector))
+
+    traces.append(go.Scatter(
+        x=[x for x, _, _ in heads],
+        y=[y for _, y, _ in heads],
+        mode="markers+text",
+        marker=dict(size=10, color=[sector_colors[s] for _, _, s in heads], line=dict(width=2, color="white")),
+        text=[s for _, _, s in heads],
+        textposition="top center",
+        customdata=[s for _, _, s in heads],
+        showlegend=False,
+        hovertemplate=(
+            "<b>%{customdata}</b><br>"
+            "RS-Ratio: %{x:.2f}<br>"
+            "RS-Momentum: %{y:.2f}<br>"
+            "<extra></extra>"
+        )
+    ))
+    return traces
+
+
+def plot_rrg_animation(replay, tail_length, dates, frame_duration=150):
+    """
+    Animated RRG rotation over `dates` from a backend.replay.RRGReplay.
+
+    Every Plotly frame carries only that date's tail window, and playback and
+    scrubbing run entirely in the browser.
+    """
+    started = time.perf_counter()
+    sectors = replay.sectors
+    sector_colors = {sector: COLOR_PALETTE[i % len(COLOR_PALETTE)] for i, sector in enumerate(sectors)}
+
+    frames = [
+        go.Frame(data=_replay_traces(frame, sectors, sector_colors), name=str(date.date()))
+        for date, frame in replay.frames(dates, tail_length)
+    ]
+    if not frames:
+        raise ValueError("No RRG history in the selected window.")
+
+    fig = go.Figure(data=frames[-1].data, frames=frames)
+    _add_layout(fig)
+
+    play_args = dict(frame=dict(duration=frame_duration, redraw=False), transition=dict(duration=0), fromcurrent=True)
+    fig.update_layout(
+        height=700,
+        margin=dict(l=40, r=200, t=40, b=40),
+        plot_bgcolor="white",
+        hovermode='closest',
+        updatemenus=[dict(
+            type="buttons",
+            direction="left",
+            x=0, y=-0.08, xanchor="left", yanchor="top",
+            buttons=[
+                dict(label="▶ Play", method="animate", args=[None, play_args]),
+                dict(label="⏸ Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ]
+        )],
+        sliders=[dict(
+            active=len(frames) - 1,
+            x=0.15, y=-0.05, len=0.85,
+            currentvalue=dict(prefix="Date: "),
+            steps=[
+                dict(label=f.name, method="animate",
+                     args=[[f.name], dict(frame=dict(duration=0, redraw=False), mode="immediate")])
+                for f in frames
+            ]
+        )]
+    )
+
+    record("plot_rrg_animation", time.perf_counter() - started, frames=len(frames))
+    return fig
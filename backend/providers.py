@@ -0,0 +1,256 @@
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def period_start(period: str, now: pd.Timestamp = None):
+    """
+    Translate a yfinance period string ("5d", "3mo", "1y", "ytd", "max") into
+    the first calendar date it covers. Returns None for "max".
+    """
+    today = (now or pd.Timestamp.now()).normalize()
+
+    if period == "max":
+        return None
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period {period!r}")
+
+    n, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }
+    return today - offsets[unit]
+
+
+def _normalize_index(df: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    return df
+
+
+def _slice_window(df: pd.DataFrame, period: str = None, start=None, now: pd.Timestamp = None) -> pd.DataFrame:
+    """Cut a full history down to the requested period/start window."""
+    if start is None and period is not None:
+        start = period_start(period, now)
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    return df
+
+
+def safe_filename(ticker: str) -> str:
+    """File-system safe stem for a ticker, e.g. "^NSEI" -> "_NSEI"."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+
+
+class PriceProvider:
+    """
+    Source of daily OHLCV bars.
+
+    Subclasses implement `fetch_one`, which must be safe to call from several
+    threads at once. `fetch` may be overridden when the source has a cheaper
+    bulk request. Both accept either `period=` (yfinance period string) or
+    `start=` (first date to return).
+    """
+
+    # Whether load_price_data should keep an on-disk copy of this provider's data
+    cacheable = False
+
+    # Whether requests go to a remote source that throttles (see data.FetchScheduler)
+    rate_limited = False
+
+    def fetch_one(self, ticker: str, timeout: float = None, **window) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def fetch(self, tickers: list, **window) -> dict:
+        return {ticker: self.fetch_one(ticker, **window) for ticker in tickers}
+
+
+def _yfinance():
+    # Imported on first fetch: yfinance pulls in curl_cffi/requests and adds
+    # noticeably to start-up for code that only needs the RRG math
+    import yfinance
+    return yfinance
+
+
+class YFinanceProvider(PriceProvider):
+    """Live data from Yahoo Finance (the default provider)."""
+
+    cacheable = True
+    rate_limited = True
+
+    def fetch_one(self, ticker: str, timeout: float = None, **window) -> pd.DataFrame:
+        yf = _yfinance()
+
+        # Ticker.history is safe to call from several threads, unlike
+        # yf.download which shares module-level result buffers
+        df = yf.Ticker(ticker).history(
+            auto_adjust=True,
+            timeout=timeout or 10,
+            raise_errors=True,
+            **window
+        )
+        columns = [c for c in OHLCV_COLUMNS if c in df.columns]
+        return _normalize_index(df[columns])
+
+    def fetch(self, tickers: list, **window) -> dict:
+        """
+        Download several tickers in one bulk request.
+
+        Returns:
+            Dictionary mapping each ticker to its own OHLCV DataFrame. Tickers the
+            provider returned nothing for map to an empty DataFrame.
+        """
+        yf = _yfinance()
+        raw = yf.download(
+            tickers,
+            progress=False,
+            auto_adjust=True,
+            group_by="ticker",
+            **window
+        )
+
+        frames = {}
+        if not isinstance(raw.columns, pd.MultiIndex):
+            # Single-ticker request comes back flat
+            frames[tickers[0]] = _normalize_index(raw)
+            return frames
+
+        available = set(raw.columns.get_level_values(0))
+        for ticker in tickers:
+            if ticker not in available:
+                frames[ticker] = pd.DataFrame()
+                continue
+
+            # Rows belong to the union of all calendars; drop dates this ticker did not trade
+            frames[ticker] = _normalize_index(raw[ticker].dropna(how="all"))
+
+        return frames
+
+
+class LocalFileProvider(PriceProvider):
+    """
+    Replays OHLCV snapshots from a directory holding one `<ticker>.parquet` or
+    `<ticker>.csv` per ticker (ticker names pass through `safe_filename`).
+
+    Periods are measured back from the last bar in each file rather than from
+    today, so a snapshot replays identically whenever it is loaded.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, ticker: str):
+        stem = os.path.join(self.root, safe_filename(ticker))
+        for ext in (".parquet", ".csv"):
+            if os.path.exists(stem + ext):
+                return stem + ext
+        return None
+
+    def fetch_one(self, ticker: str, timeout: float = None, **window) -> pd.DataFrame:
+        path = self._path(ticker)
+        if path is None:
+            return pd.DataFrame()
+
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+
+        df = _normalize_index(df.sort_index())
+        if df.empty:
+            return df
+        return _slice_window(df, now=df.index.max(), **window)
+
+    @staticmethod
+    def save(frames: dict, root: str, fmt: str = "parquet") -> None:
+        """Write a {ticker: DataFrame} snapshot that LocalFileProvider can replay."""
+        os.makedirs(root, exist_ok=True)
+        for ticker, df in frames.items():
+            path = os.path.join(root, f"{safe_filename(ticker)}.{fmt}")
+            if fmt == "parquet":
+                df.to_parquet(path)
+            else:
+                df.to_csv(path)
+
+
+class SyntheticProvider(PriceProvider):
+    """
+    Deterministic geometric random-walk prices for any ticker name.
+
+    Each ticker's path is seeded from `seed` and the ticker itself, so the same
+    ticker always yields the same bars, and thousands of tickers can be
+    generated without any I/O.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        end: str = None,
+        years: int = 20,
+        drift: float = 0.0003,
+        volatility: float = 0.012
+    ):
+        self.seed = seed
+        self.end = pd.Timestamp(end).normalize() if end else pd.Timestamp.now().normalize()
+        self.dates = pd.bdate_range(end=self.end, periods=years * 252)
+        self.drift = drift
+        self.volatility = volatility
+
+    def _window_dates(self, period: str = None, start=None) -> pd.DatetimeIndex:
+        if start is None and period is not None:
+            start = period_start(period, self.end)
+        if start is None:
+            return self.dates
+        return self.dates[self.dates >= pd.Timestamp(start)]
+
+    def _closes(self, ticker: str) -> np.ndarray:
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+        returns = rng.normal(self.drift, self.volatility, len(self.dates))
+        start_price = rng.uniform(100, 5000)
+        return start_price * np.exp(np.cumsum(returns))
+
+    def fetch_one(self, ticker: str, timeout: float = None, **window) -> pd.DataFrame:
+        dates = self._window_dates(**window)
+        close = self._closes(ticker)
+        prev = np.concatenate([close[:1], close[:-1]])
+        close, prev = close[len(close) - len(dates):], prev[len(prev) - len(dates):]
+
+        spread = np.abs(close - prev) + close * self.volatility * 0.5
+        return pd.DataFrame({
+            "Open": prev,
+            "High": np.maximum(prev, close) + spread * 0.5,
+            "Low": np.minimum(prev, close) - spread * 0.5,
+            "Close": close,
+            "Volume": np.full(len(close), 1_000_000.0),
+        }, index=dates)
+
+
+def provider_from_env() -> PriceProvider:
+    """
+    Build the default provider from RRG_PRICE_PROVIDER:
+    unset or "yfinance", "synthetic[:seed]", or "local:<directory>".
+    """
+    spec = os.environ.get("RRG_PRICE_PROVIDER", "yfinance")
+    kind, _, arg = spec.partition(":")
+
+    if kind == "yfinance":
+        return YFinanceProvider()
+    if kind == "synthetic":
+        return SyntheticProvider(seed=int(arg or 0))
+    if kind == "local":
+        return LocalFileProvider(arg)
+
+    raise ValueError(f"Unknown RRG_PRICE_PROVIDER {spec!r}")
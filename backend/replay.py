@@ -0,0 +1,66 @@
+from functools import lru_cache
+
+import numpy as np
+
+from backend.alignment import align_prices
+from backend.rrg import compact_order, rrg_matrix, tails_to_frame
+
+
+class RRGReplay:
+    """
+    Full RS-Ratio / RS-Momentum history, computed once, for scrubbing through
+    past rotation.
+
+    `frame(date, tail_length)` returns what calculate_rrg would have returned
+    with prices up to `date`; it only gathers the tail window from the stored
+    history, so moving through dates never recomputes the EMA or ROC.
+    `align_kwargs` (fill, fill_limit) are passed to align_prices.
+    """
+
+    def __init__(self, data, rs_period, roc_period, benchmark="^NSEI", **align_kwargs):
+        aligned = align_prices(data, benchmark, **align_kwargs)
+        rel = aligned.relative_strength()
+
+        self.dates = aligned.dates
+        self.sectors = aligned.sectors
+        self.rs_period = rs_period
+        self.roc_period = roc_period
+
+        # Compacted history: each column's valid points sit at the bottom
+        self._rs_ratio, self._rs_momentum = rrg_matrix(rel, rs_period, roc_period)
+        valid = ~(np.isnan(self._rs_ratio) | np.isnan(self._rs_momentum))
+        self._first_valid = len(valid) - valid.sum(axis=0)
+
+        # Number of valid points per sector on or before each calendar date
+        on_calendar = np.zeros_like(valid)
+        np.put_along_axis(on_calendar, compact_order(rel), valid, axis=0)
+        self._valid_upto = on_calendar.cumsum(axis=0)
+
+        self.frame = lru_cache(maxsize=1024)(self._frame)
+
+    def _frame(self, date, tail_length):
+        i = self.dates.searchsorted(date, side="right") - 1
+        if i < 0:
+            raise ValueError(f"No RRG history on or before {date}")
+
+        # Packed rows [end - tail_length, end) of every column, clipped at its first valid row
+        end = self._first_valid + self._valid_upto[i]
+        rows = end[None, :] + np.arange(-tail_length, 0)[:, None]
+        outside = rows < self._first_valid[None, :]
+        rows = rows.clip(0, len(self._rs_ratio) - 1)
+
+        rs_ratio = np.take_along_axis(self._rs_ratio, rows, axis=0)
+        rs_momentum = np.take_along_axis(self._rs_momentum, rows, axis=0)
+        rs_ratio[outside] = np.nan
+        rs_momentum[outside] = np.nan
+
+        return tails_to_frame(self.sectors, rs_ratio, rs_momentum, tail_length)
+
+    def replay_dates(self, tail_length=2):
+        """Dates with at least `tail_length` points for some sector."""
+        return self.dates[(self._valid_upto >= tail_length).any(axis=1)]
+
+    def frames(self, dates, tail_length):
+        """Lazily yield (date, calculate_rrg-style frame) for each of `dates`."""
+        for date in dates:
+            yield date, self.frame(date, tail_length)
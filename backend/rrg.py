@@ -1,63 +1,155 @@
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
+from backend.alignment import align_prices
+from backend.diagnostics import span
+
 
-def calculate_rrg(data, rs_period, roc_period, tail_length):
+def align_closes(data, benchmark="^NSEI", **align_kwargs):
     """
-    Returns multi-point RRG history per sector.
-    Output columns: sector, rs_ratio, rs_momentum
+    Align every sector's Close against the benchmark in one dates x sectors frame.
+
+    Args:
+        benchmark: Key of the benchmark in `data`, or a list of keys
+        align_kwargs: Fill policy passed to align_prices (fill, fill_limit)
+
+    Returns:
+        (closes, benchmark_close): closes has one column per sector (in the
+        order of `data`, benchmarks excluded) on the master calendar;
+        missing bars are NaN. benchmark_close is a Series, or a dates x
+        benchmarks frame when `benchmark` is a list.
+    """
+    return align_prices(data, benchmark, **align_kwargs).frames(single=isinstance(benchmark, str))
+
+
+def relative_strength(data, benchmark="^NSEI", **align_kwargs):
+    """
+    Sector / benchmark close ratios as one dates x columns array.
+
+    With several benchmarks every sector is divided by every benchmark in a
+    single broadcast, laid out benchmark-major: column `b * n_sectors + s` is
+    sector s against benchmark b.
+
+    Returns:
+        (rel, sectors, benchmarks): benchmarks is None for a single benchmark.
+    """
+    aligned = align_prices(data, benchmark, **align_kwargs)
+    return aligned.relative_strength(), aligned.sectors, None if isinstance(benchmark, str) else aligned.benchmarks
+
+
+def compact_order(values):
+    """
+    Row order that pushes each column's NaNs to the top, keeping valid values
+    in order. `order[r, j]` is the original row of compacted row `r`.
+    """
+    return np.argsort(~np.isnan(values), axis=0, kind="stable")
+
+
+def _compact(values):
+    """
+    Push each column's NaNs to the top, keeping valid values in order.
+
+    This turns per-column `dropna()` into a rectangular block where each
+    column's history ends on the last row, so rolling operations can run over
+    all columns at once and still match the per-series result.
+    """
+    return np.take_along_axis(values, compact_order(values), axis=0)
+
+
+def _rrg_arrays(rel, rs_period, roc_period):
+    """rrg_matrix plus the compacted relative strength and its EMA."""
+    rel = _compact(np.asarray(rel, dtype=float))
+
+    # RS-Ratio (EMA normalized to 100); leading NaNs don't affect the recursion
+    ema = pd.DataFrame(rel).ewm(span=rs_period, adjust=False).mean().to_numpy()
+    rs_ratio = rel / ema * 100
+
+    # RS-Momentum (ROC normalized to 100)
+    shifted = np.full_like(rs_ratio, np.nan)
+    if roc_period < len(rs_ratio):
+        shifted[roc_period:] = rs_ratio[:-roc_period] if roc_period else rs_ratio
+    rs_momentum = rs_ratio / shifted * 100
+
+    return rel, ema, rs_ratio, rs_momentum
+
+
+def rrg_matrix(rel, rs_period, roc_period):
     """
+    Vectorized RS-Ratio / RS-Momentum for a dates x tickers relative-strength matrix.
 
-    records = []
+    Args:
+        rel: 2-D array (or DataFrame) of sector close / benchmark close
+        rs_period: EMA span for RS-Ratio
+        roc_period: look-back for RS-Momentum
 
-    benchmark_df = data["^NSEI"]
-    benchmark_close = benchmark_df["Close"]
+    Returns:
+        (rs_ratio, rs_momentum) arrays with each column's NaN-free history
+        right-aligned to the last row.
+    """
+    _, _, rs_ratio, rs_momentum = _rrg_arrays(rel, rs_period, roc_period)
+    return rs_ratio, rs_momentum
 
-    for sector, df in data.items():
-        if sector == "^NSEI":
-            continue
 
-        try:
-            rel = df["Close"] / benchmark_close
-            rel = rel.dropna()
+def tails_to_frame(sectors, rs_ratio, rs_momentum, tail_length, benchmarks=None):
+    """
+    Flatten the last `tail_length` rows of dates x sectors RS-Ratio /
+    RS-Momentum arrays into calculate_rrg's long format, skipping NaN rows.
 
-            # RS-Ratio (EMA normalized to 100)
-            rs_ratio = (
-                rel / rel.ewm(span=rs_period, adjust=False).mean()
-            ) * 100
+    With `benchmarks`, the columns are benchmark-major blocks of `sectors`
+    (see relative_strength) and a benchmark column is added.
+    """
+    start = max(len(rs_ratio) - tail_length, 0)
+    ratio_tail = rs_ratio[start:].T
+    momentum_tail = rs_momentum[start:].T
+    valid = ~(np.isnan(ratio_tail) | np.isnan(momentum_tail))
+    counts = valid.sum(axis=1)
 
-            # RS-Momentum (ROC normalized to 100)
-            rs_momentum = (
-                rs_ratio / rs_ratio.shift(roc_period)
-            ) * 100
+    labels = np.asarray(sectors, dtype=object)
+    if benchmarks is None:
+        return pd.DataFrame({
+            "rs_ratio": ratio_tail[valid],
+            "rs_momentum": momentum_tail[valid],
+            "sector": np.repeat(labels, counts),
+        })
 
-            # Create DataFrame from Series with proper index
-            rrg_df = pd.DataFrame({
-                "rs_ratio": rs_ratio.values,
-                "rs_momentum": rs_momentum.values
-            })
+    return pd.DataFrame({
+        "rs_ratio": ratio_tail[valid],
+        "rs_momentum": momentum_tail[valid],
+        "sector": np.repeat(np.tile(labels, len(benchmarks)), counts),
+        "benchmark": np.repeat(np.repeat(np.asarray(benchmarks, dtype=object), len(labels)), counts),
+    })
 
-            # Drop NaN values first
-            rrg_df = rrg_df.dropna()
 
-            # Add sector column
-            rrg_df["sector"] = sector
+def calculate_rrg(data, rs_period, roc_period, tail_length, benchmark="^NSEI", **align_kwargs):
+    """
+    Returns multi-point RRG history per sector.
+    Output columns: sector, rs_ratio, rs_momentum
 
-            # keep only tail
-            rrg_df = rrg_df.tail(tail_length)
+    All sectors are aligned into one dates x sectors matrix and computed in a
+    single vectorized pass. `benchmark` is the key of the benchmark frame in
+    `data` (the ticker passed to load_price_data).
 
-            records.append(rrg_df)
+    `benchmark` may also be a list of keys in `data` (e.g. Nifty 50, Nifty
+    500 and Midcap loaded alongside the sectors). Every sector is then
+    computed against every benchmark in the same pass over a dates x
+    (benchmarks x sectors) matrix, and the output gains a benchmark column;
+    filtering it on one benchmark gives calculate_rrg for that benchmark.
 
-        except Exception as e:
-            print(f"Error processing sector {sector}: {e}")
-            continue
+    `align_kwargs` (fill, fill_limit) choose how missing bars are treated;
+    see align_prices.
+    """
+
+    with span("calculate_rrg", sectors=len(data) - 1):
+        rel, sectors, benchmarks = relative_strength(data, benchmark, **align_kwargs)
+        rs_ratio, rs_momentum = rrg_matrix(rel, rs_period, roc_period)
+        df = tails_to_frame(sectors, rs_ratio, rs_momentum, tail_length, benchmarks)
 
     # Check if we have any data
-    if not records:
+    if df.empty:
         raise ValueError("No valid sector data found. Please check your data sources and try again.")
 
-    df = pd.concat(records, ignore_index=True)
-
     # ✅ validate AFTER creation
     required_cols = {"sector", "rs_ratio", "rs_momentum"}
     missing = required_cols - set(df.columns)
@@ -66,3 +158,262 @@ def calculate_rrg(data, rs_period, roc_period, tail_length):
 
     return df
 
+
+def rrg_history(data, rs_period, roc_period, benchmark="^NSEI", **align_kwargs):
+    """
+    Full RS-Ratio / RS-Momentum history on the master calendar.
+
+    Computed in the same single pass as calculate_rrg, then scattered back
+    from the compacted block onto the dates each value belongs to.
+
+    Returns:
+        (rs_ratio, rs_momentum) DataFrames indexed by date, NaN where a
+        sector has no value yet or no bar. Columns are the sectors, or
+        (benchmark, sector) pairs when `benchmark` is a list.
+    """
+    aligned = align_prices(data, benchmark, **align_kwargs)
+    rel = aligned.relative_strength()
+    order = compact_order(rel)
+
+    if isinstance(benchmark, str):
+        columns = pd.Index(aligned.sectors)
+    else:
+        columns = pd.MultiIndex.from_product([aligned.benchmarks, aligned.sectors], names=["benchmark", "sector"])
+
+    frames = []
+    for values in rrg_matrix(rel, rs_period, roc_period):
+        on_calendar = np.empty_like(values)
+        np.put_along_axis(on_calendar, order, values, axis=0)
+        frames.append(pd.DataFrame(on_calendar, index=aligned.dates, columns=columns))
+    return tuple(frames)
+
+
+# Quadrant codes returned by classify_quadrants, indexable by code
+QUADRANTS = ("Lagging", "Improving", "Weakening", "Leading")
+
+
+def classify_quadrants(rs_ratio, rs_momentum):
+    """
+    Vectorized quadrant code for any shape of RS-Ratio / RS-Momentum arrays.
+
+    Returns:
+        int8 array: 0 Lagging, 1 Improving, 2 Weakening, 3 Leading, -1 where
+        either input is NaN. Use QUADRANTS[code] for the name.
+    """
+    rs_ratio = np.asarray(rs_ratio, dtype=float)
+    rs_momentum = np.asarray(rs_momentum, dtype=float)
+
+    codes = (2 * (rs_ratio >= 100) + (rs_momentum >= 100)).astype(np.int8)
+    codes[np.isnan(rs_ratio) | np.isnan(rs_momentum)] = -1
+    return codes
+
+
+class RRGSweep:
+    """
+    RRG tails for every (rs_period, roc_period) combination.
+
+    Attributes:
+        rs_ratio: (len(rs_periods), len(roc_periods), n_columns, tail_length)
+            array; a broadcast view, since RS-Ratio does not depend on roc_period
+        rs_momentum: array of the same shape
+        benchmarks: None for a single benchmark (one column per sector), or
+            the benchmark list, with columns laid out as in relative_strength
+        NaN marks tail slots with no valid value (short histories).
+    """
+
+    def __init__(self, sectors, rs_periods, roc_periods, rs_ratio, rs_momentum, benchmarks=None):
+        self.sectors = list(sectors)
+        self.rs_periods = list(rs_periods)
+        self.roc_periods = list(roc_periods)
+        self.rs_ratio = rs_ratio
+        self.rs_momentum = rs_momentum
+        self.benchmarks = benchmarks
+
+    def frame(self, rs_period, roc_period, tail_length=None):
+        """Look up one combination in calculate_rrg's long format."""
+        i = self.rs_periods.index(rs_period)
+        k = self.roc_periods.index(roc_period)
+        tail_length = self.rs_ratio.shape[-1] if tail_length is None else tail_length
+        start = max(self.rs_ratio.shape[-1] - tail_length, 0)
+
+        # tails_to_frame expects dates x sectors
+        df = tails_to_frame(
+            self.sectors,
+            self.rs_ratio[i, k, :, start:].T,
+            self.rs_momentum[i, k, :, start:].T,
+            tail_length,
+            self.benchmarks
+        )
+        if df.empty:
+            raise ValueError("No valid sector data found. Please check your data sources and try again.")
+        return df
+
+    def quadrants(self):
+        """Latest quadrant code per (rs_period, roc_period, column)."""
+        return classify_quadrants(self.rs_ratio[..., -1], self.rs_momentum[..., -1])
+
+
+def rrg_sweep(data, rs_periods, roc_periods, tail_length, benchmark="^NSEI", **align_kwargs):
+    """
+    Compute RRG tails for a whole grid of EMA / ROC periods in one go.
+
+    Relative strength is aligned and compacted once, each EMA span runs once
+    over all sectors, and every ROC period reuses that RS-Ratio matrix, so the
+    full 26 x 26 slider grid costs about 26 EMA passes.
+
+    Returns:
+        RRGSweep; `sweep.frame(rs, roc, tail)` matches
+        `calculate_rrg(data, rs, roc, tail, benchmark, **align_kwargs)`,
+        including for a list of benchmarks.
+    """
+    rel, sectors, benchmarks = relative_strength(data, benchmark, **align_kwargs)
+    rel = _compact(rel)
+
+    n_dates, n_columns = rel.shape
+    rs_periods, roc_periods = list(rs_periods), list(roc_periods)
+    ratio = np.full((len(rs_periods), n_columns, tail_length), np.nan)
+    momentum = np.full((len(rs_periods), len(roc_periods), n_columns, tail_length), np.nan)
+
+    # Only the last tail_length rows (and their ROC look-backs) are ever needed
+    rows = np.arange(n_dates - tail_length, n_dates)
+    keep = rows >= 0
+    rows = rows[keep]
+
+    for i, rs_period in enumerate(rs_periods):
+        ema = pd.DataFrame(rel).ewm(span=rs_period, adjust=False).mean().to_numpy()
+        rs_ratio = rel / ema * 100
+        ratio[i][:, keep] = rs_ratio[rows].T
+
+        for k, roc_period in enumerate(roc_periods):
+            back = rows - roc_period
+            shifted = np.full((len(rows), n_columns), np.nan)
+            shifted[back >= 0] = rs_ratio[back[back >= 0]]
+            # Look-backs into a column's leading NaNs stay NaN, as with shift()
+            momentum[i, k][:, keep] = (rs_ratio[rows] / shifted * 100).T
+
+    rs_ratio = np.broadcast_to(ratio[:, None], momentum.shape)
+    return RRGSweep(sectors, rs_periods, roc_periods, rs_ratio, momentum, benchmarks)
+
+
+class IncrementalRRG:
+    """
+    Stateful RRG calculator that folds in one bar at a time.
+
+    Per sector it keeps the EMA accumulator, a ring buffer of the last
+    `roc_period` RS-Ratio values and the current tail, so each new bar costs
+    O(1) regardless of history length. `to_frame()` returns exactly what
+    `calculate_rrg` would return for the same prices.
+
+    Example:
+        state = IncrementalRRG.from_prices(price_data, 10, 12, 5)
+        state.update({"IT": 35210.5, "Bank": 48110.0}, benchmark_close=22350.2)
+        rrg_metrics = state.to_frame()
+    """
+
+    def __init__(self, rs_period, roc_period, tail_length, benchmark="^NSEI"):
+        self.rs_period = rs_period
+        self.roc_period = roc_period
+        self.tail_length = tail_length
+        self.benchmark = benchmark
+        self.last_date = None
+
+        # Same arithmetic as pandas' adjust=False EWM, so results are bit-identical
+        self._alpha = 1.0 / (1.0 + (rs_period - 1) / 2.0)
+        self._old_wt = 1.0 - self._alpha
+
+        self._ema = {}
+        self._ratios = {}
+        self._tails = {}
+
+    def _add_sector(self, sector):
+        self._ema[sector] = None
+        self._ratios[sector] = deque(maxlen=self.roc_period)
+        self._tails[sector] = deque(maxlen=self.tail_length)
+
+    @classmethod
+    def from_prices(cls, data, rs_period, roc_period, tail_length, benchmark="^NSEI"):
+        """Seed the state from a load_price_data dict with one vectorized pass."""
+        state = cls(rs_period, roc_period, tail_length, benchmark)
+
+        closes, benchmark_close = align_closes(data, benchmark)
+        rel, ema, rs_ratio, rs_momentum = _rrg_arrays(
+            closes.div(benchmark_close, axis=0), rs_period, roc_period
+        )
+
+        for j, sector in enumerate(closes.columns):
+            state._add_sector(sector)
+            valid = ~np.isnan(rel[:, j])
+            if not valid.any():
+                continue
+
+            state._ema[sector] = ema[-1, j]
+            if roc_period:
+                state._ratios[sector].extend(rs_ratio[valid, j][-roc_period:])
+
+            pairs = np.column_stack([rs_ratio[:, j], rs_momentum[:, j]])
+            pairs = pairs[~np.isnan(pairs).any(axis=1)]
+            state._tails[sector].extend(map(tuple, pairs[max(len(pairs) - tail_length, 0):]))
+
+        state.last_date = closes.index.max()
+        return state
+
+    def update(self, closes, benchmark_close, date=None):
+        """
+        Fold in one bar.
+
+        Args:
+            closes: Mapping of sector -> close for this bar. Missing or NaN
+                closes leave that sector untouched, as `dropna()` does in batch.
+            benchmark_close: Benchmark close for this bar
+            date: Optional bar date, recorded as `last_date`
+        """
+        if date is not None:
+            self.last_date = pd.Timestamp(date)
+
+        if benchmark_close is None or np.isnan(benchmark_close):
+            return
+
+        for sector, close in closes.items():
+            if sector == self.benchmark or close is None or np.isnan(close):
+                continue
+            if sector not in self._ema:
+                self._add_sector(sector)
+
+            rel = close / benchmark_close
+            ema = self._ema[sector]
+            if ema is None:
+                ema = rel
+            else:
+                ema = ((self._old_wt * ema) + (self._alpha * rel)) / (self._old_wt + self._alpha)
+            self._ema[sector] = ema
+
+            rs_ratio = rel / ema * 100
+            ratios = self._ratios[sector]
+            if self.roc_period == 0:
+                self._tails[sector].append((rs_ratio, rs_ratio / rs_ratio * 100))
+            elif len(ratios) == self.roc_period:
+                # ratios[0] is the RS-Ratio exactly roc_period bars ago
+                self._tails[sector].append((rs_ratio, rs_ratio / ratios[0] * 100))
+            ratios.append(rs_ratio)
+
+    def extend(self, data):
+        """Fold in every bar of a load_price_data dict newer than `last_date`."""
+        closes, benchmark_close = align_closes(data, self.benchmark)
+        if self.last_date is not None:
+            newer = closes.index > self.last_date
+            closes, benchmark_close = closes[newer], benchmark_close[newer]
+
+        for date, row in closes.iterrows():
+            self.update(row.to_dict(), benchmark_close[date], date)
+
+    def to_frame(self):
+        """Current tails in calculate_rrg's long format."""
+        records = [
+            (rs_ratio, rs_momentum, sector)
+            for sector, tail in self._tails.items()
+            for rs_ratio, rs_momentum in tail
+        ]
+        if not records:
+            raise ValueError("No valid sector data found. Please check your data sources and try again.")
+
+        return pd.DataFrame(records, columns=["rs_ratio", "rs_momentum", "sector"])
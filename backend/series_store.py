@@ -0,0 +1,223 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backend.alignment import align_prices
+from backend.data import TIMEFRAMES
+from backend.providers import safe_filename
+from backend.rrg import tails_to_frame
+from backend.shared import last_closed_session
+
+# Append-only RRG history: one file of fixed-size records per (key, benchmark, rs_period, roc_period)
+SERIES_DIR = os.environ.get(
+    "RRG_SERIES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "series")
+)
+
+# One record per bar the key traded with the benchmark. rel and ema are the
+# EMA state needed to continue the series without re-reading prices.
+RECORD_DTYPE = np.dtype([
+    ("date", "M8[ns]"),
+    ("rel", "<f8"),
+    ("ema", "<f8"),
+    ("rs_ratio", "<f8"),
+    ("rs_momentum", "<f8"),
+])
+
+
+def closed_bars(dates, timeframe="daily", now=None) -> np.ndarray:
+    """
+    Mask of the bars in `dates` whose whole period has closed as of `now`.
+
+    A daily bar is open until its session settles (see last_closed_session);
+    a weekly or monthly bar, labelled with its last trading date by
+    resample_prices, until the week or month it belongs to has ended.
+    """
+    dates = pd.DatetimeIndex(dates).normalize()
+    rule = TIMEFRAMES[timeframe]
+    if rule is not None:
+        # Roll each label forward to the end of its period (a label already on it stays put)
+        dates = dates - pd.Timedelta(days=1) + pd.tseries.frequencies.to_offset(rule)
+    return np.asarray(dates <= pd.Timestamp(last_closed_session(now)))
+
+
+class SeriesStore:
+    """
+    Full RS-Ratio / RS-Momentum history on disk, read through memory maps.
+
+    Each (key, benchmark, rs_period, roc_period) series is a flat file of
+    RECORD_DTYPE records in date order. `update` only appends bars newer than
+    the last stored one, continuing the EMA from the stored state, so the
+    series stay bit-identical to a full recomputation. Only closed bars are
+    stored: an open one would otherwise be frozen at its intraday value. Readers map the files
+    read-only: a range query or replay frame binary-searches the date column
+    and touches only the pages it returns.
+    """
+
+    def __init__(self, root: str = SERIES_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path(self, key, benchmark, rs_period, roc_period) -> str:
+        return os.path.join(
+            self.root, safe_filename(benchmark), f"{rs_period}_{roc_period}", f"{safe_filename(key)}.rrs"
+        )
+
+    def series(self, key, benchmark, rs_period, roc_period) -> np.ndarray:
+        """Stored records as a read-only memory map (an empty array when there are none)."""
+        path = self.path(key, benchmark, rs_period, roc_period)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        # A torn final record (crash mid-append) is ignored and overwritten by the next append
+        count = size // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def range(self, key, benchmark, rs_period, roc_period, start=None, end=None) -> pd.DataFrame:
+        """rs_ratio and rs_momentum indexed by date, from `start` through `end` inclusive."""
+        records = self.series(key, benchmark, rs_period, roc_period)
+        dates = records["date"]
+        lo = dates.searchsorted(np.datetime64(pd.Timestamp(start), "ns")) if start is not None else 0
+        hi = dates.searchsorted(np.datetime64(pd.Timestamp(end), "ns"), side="right") if end is not None else len(dates)
+        window = records[lo:hi]
+        return pd.DataFrame(
+            {"rs_ratio": window["rs_ratio"], "rs_momentum": window["rs_momentum"]},
+            index=pd.DatetimeIndex(window["date"], name="date")
+        )
+
+    def update(self, data, rs_period, roc_period, benchmark="^NSEI", timeframe="daily", now=None, **align_kwargs) -> dict:
+        """
+        Append every closed bar of `data` newer than what is stored, for all sectors at once.
+
+        Args:
+            data: load_price_data dict or PricePanel holding `benchmark`
+            benchmark: Key of the benchmark in `data`; the store is keyed by it
+            timeframe: Bar size of `data`, to tell whether its last bar has closed
+            now: Time to judge that against (default: the current time)
+            align_kwargs: fill and fill_limit, passed to align_prices
+
+        Returns:
+            Dict of key -> number of records appended.
+
+        Raises:
+            ValueError: `data` has new bars for a key but no longer reaches
+                back to its last stored one (nothing is appended).
+        """
+        aligned = align_prices(data, benchmark, **align_kwargs)
+        closed = closed_bars(aligned.dates, timeframe, now)
+        rel = aligned.relative_strength()[closed]
+        dates = aligned.dates[closed].to_numpy(dtype="M8[ns]")
+        if not len(dates):
+            return {}
+        n_sectors = len(aligned.sectors)
+
+        # Stored state per sector: last date, EMA and the last roc_period RS-Ratios
+        last = np.full(n_sectors, np.datetime64("NaT"), dtype="M8[ns]")
+        seed = np.full((1, n_sectors), np.nan)
+        lookback = np.full((roc_period, n_sectors), np.nan)
+        for j, key in enumerate(aligned.sectors):
+            records = self.series(key, benchmark, rs_period, roc_period)
+            if len(records):
+                last[j] = records["date"][-1]
+                seed[0, j] = records["ema"][-1]
+                if roc_period:
+                    ratios = records["rs_ratio"][-roc_period:]
+                    lookback[roc_period - len(ratios):, j] = ratios
+
+        # New bars move to the top of each column, in date order
+        stored = ~np.isnat(last)
+        new = ~np.isnan(rel) & (~stored[None, :] | (dates[:, None] > np.where(stored, last, dates[0])[None, :]))
+        counts = new.sum(axis=0)
+        if not counts.any():
+            return {}
+
+        # Continuing the EMA is only exact when `data` still holds the last stored bar
+        at = dates.searchsorted(np.where(stored, last, dates[0])).clip(max=len(dates) - 1)
+        overlaps = (dates[at] == last) & ~np.isnan(rel[at, np.arange(n_sectors)])
+        gaps = [key for j, key in enumerate(aligned.sectors) if stored[j] and counts[j] and not overlaps[j]]
+        if gaps:
+            raise ValueError(
+                f"Prices for {', '.join(map(str, gaps))} start after their last stored bar; "
+                "load a longer period so the series can be continued without a gap"
+            )
+        order = np.argsort(~new, axis=0, kind="stable")[:counts.max()]
+        block = np.take_along_axis(rel, order, axis=0)
+        block[np.arange(len(block))[:, None] >= counts[None, :]] = np.nan
+
+        # Seeding the EWM with the stored EMA continues the adjust=False recursion exactly
+        ema = pd.DataFrame(np.vstack([seed, block])).ewm(span=rs_period, adjust=False).mean().to_numpy()[1:]
+        rs_ratio = block / ema * 100
+        ratios = np.vstack([lookback, rs_ratio])
+        rs_momentum = rs_ratio / (ratios[:-roc_period] if roc_period else rs_ratio) * 100
+
+        appended = {}
+        with self._lock:
+            for j, key in enumerate(aligned.sectors):
+                n = counts[j]
+                if not n:
+                    continue
+                records = np.empty(n, dtype=RECORD_DTYPE)
+                records["date"] = dates[order[:n, j]]
+                records["rel"] = block[:n, j]
+                records["ema"] = ema[:n, j]
+                records["rs_ratio"] = rs_ratio[:n, j]
+                records["rs_momentum"] = rs_momentum[:n, j]
+                self._append(self.path(key, benchmark, rs_period, roc_period), records)
+                appended[key] = int(n)
+        return appended
+
+    def _append(self, path: str, records: np.ndarray) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            # Drop a torn record left by an interrupted append before writing after it
+            f.truncate(f.tell() - f.tell() % RECORD_DTYPE.itemsize)
+            f.write(records.tobytes())
+
+    def replay(self, keys, benchmark, rs_period, roc_period):
+        """StoredReplay over the stored series of `keys` (those with no history are left out)."""
+        return StoredReplay(self, keys, benchmark, rs_period, roc_period)
+
+
+class StoredReplay:
+    """
+    RRGReplay's interface (sectors, frame, frames, replay_dates) served from
+    a SeriesStore, so plot_rrg_animation can scrub stored history without
+    loading prices or computing anything.
+    """
+
+    def __init__(self, store: SeriesStore, keys, benchmark, rs_period, roc_period):
+        series = {key: store.series(key, benchmark, rs_period, roc_period) for key in keys}
+        self._series = {key: records for key, records in series.items() if len(records)}
+        self.sectors = list(self._series)
+        self.rs_period = rs_period
+        self.roc_period = roc_period
+
+    def frame(self, date, tail_length):
+        """calculate_rrg-style tails as of `date`, read from the last tail_length records."""
+        date = np.datetime64(pd.Timestamp(date), "ns")
+        rs_ratio = np.full((tail_length, len(self.sectors)), np.nan)
+        rs_momentum = np.full((tail_length, len(self.sectors)), np.nan)
+        for j, records in enumerate(self._series.values()):
+            end = records["date"].searchsorted(date, side="right")
+            window = records[max(end - tail_length, 0):end]
+            rs_ratio[tail_length - len(window):, j] = window["rs_ratio"]
+            rs_momentum[tail_length - len(window):, j] = window["rs_momentum"]
+        return tails_to_frame(self.sectors, rs_ratio, rs_momentum, tail_length)
+
+    def replay_dates(self, tail_length=2):
+        """Stored dates on which at least one key has `tail_length` points."""
+        dates = []
+        for records in self._series.values():
+            valid = ~(np.isnan(records["rs_ratio"]) | np.isnan(records["rs_momentum"]))
+            dates.append(records["date"][valid][tail_length - 1:])
+        if not dates:
+            return pd.DatetimeIndex([])
+        return pd.DatetimeIndex(np.unique(np.concatenate(dates)))
+
+    def frames(self, dates, tail_length):
+        """Lazily yield (date, calculate_rrg-style frame) for each of `dates`."""
+        for date in dates:
+            yield date, self.frame(date, tail_length)
+
@@ -0,0 +1,304 @@
+import datetime
+import threading
+import time
+from functools import partial
+
+from backend.data import assemble_price_data, fetch_price_frames, load_price_data
+from backend.diagnostics import count, span
+from backend.memo import TTLCache
+from backend.panel import PricePanel
+from backend.providers import period_start
+
+# NSE cash market session (IST has no daylight saving, so a fixed offset is exact)
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30), "IST")
+MARKET_OPEN = datetime.time(9, 15)
+MARKET_CLOSE = datetime.time(15, 30)
+POST_CLOSE_REFRESH = datetime.time(15, 45)   # once closing prices have settled
+MARKET_REFRESH_INTERVAL = datetime.timedelta(minutes=15)
+
+# Tickers per provider request on a cold load (matches universe.UNIVERSE_CHUNK_SIZE)
+LOAD_CHUNK_SIZE = 100
+
+# Sector panels built from the shared store, per selection; dropped on every refresh
+MAX_VIEWS = 64
+
+# A ticker that failed to load is retried on demand after this long, doubling
+# with each failure up to the intraday refresh interval
+RETRY_BACKOFF = datetime.timedelta(seconds=30)
+
+
+def next_refresh(now=None, interval=MARKET_REFRESH_INTERVAL):
+    """
+    When prices should next be refreshed: every `interval` during NSE market
+    hours, once after the close, then at the next weekday's open. Exchange
+    holidays are not modelled; a refresh on one simply finds nothing new.
+
+    Args:
+        now: Current time; naive datetimes are taken to be IST
+        interval: Spacing of intraday refreshes
+
+    Returns:
+        Timezone-aware datetime in IST.
+    """
+    now = now or datetime.datetime.now(IST)
+    now = now.replace(tzinfo=IST) if now.tzinfo is None else now.astimezone(IST)
+    today = now.date()
+
+    def at(day, time):
+        return datetime.datetime.combine(day, time, tzinfo=IST)
+
+    if now.weekday() < 5:
+        if now < at(today, MARKET_OPEN):
+            return at(today, MARKET_OPEN)
+        if now < at(today, MARKET_CLOSE):
+            return min(now + interval, at(today, POST_CLOSE_REFRESH))
+        if now < at(today, POST_CLOSE_REFRESH):
+            return at(today, POST_CLOSE_REFRESH)
+
+    day = today + datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day += datetime.timedelta(days=1)
+    return at(day, MARKET_OPEN)
+
+
+def last_closed_session(now=None) -> datetime.date:
+    """
+    Latest date whose NSE session has closed and settled as of `now`: today
+    once POST_CLOSE_REFRESH has passed (or on a weekend), otherwise the day
+    before. Naive datetimes are taken to be IST.
+    """
+    now = now or datetime.datetime.now(IST)
+    now = now.replace(tzinfo=IST) if now.tzinfo is None else now.astimezone(IST)
+    if now.weekday() < 5 and now.time() < POST_CLOSE_REFRESH:
+        return now.date() - datetime.timedelta(days=1)
+    return now.date()
+
+
+class SharedPriceStore:
+    """
+    Process-wide close-only price panel shared by every dashboard session.
+
+    Tickers are loaded the first time any session asks for them; after that a
+    background thread refreshes all of them on the next_refresh schedule and
+    swaps the new panel in atomically, so reruns only read memory and never
+    wait on the provider. A ticker that fails to refresh keeps its last
+    prices; one that never loaded is retried when a session next asks for it,
+    with a backoff between attempts, as well as on every scheduled refresh.
+
+    Args:
+        period: History kept for every ticker, e.g. "5y"; see extend
+        interval: Spacing of intraday refreshes
+        chunk_size: Tickers per provider request on a cold load
+        retry_backoff: Wait before the first on-demand retry of a failed ticker
+        load_kwargs: Passed to fetch_price_frames (fetch_mode, provider, ...)
+    """
+
+    def __init__(
+        self,
+        period="5y",
+        interval=MARKET_REFRESH_INTERVAL,
+        chunk_size=LOAD_CHUNK_SIZE,
+        retry_backoff=RETRY_BACKOFF,
+        **load_kwargs
+    ):
+        self.period = period
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.retry_backoff = retry_backoff
+        self.load_kwargs = load_kwargs
+
+        self.version = 0
+        self.refreshed_at = None
+        self._panel = None    # keyed by ticker
+        self._errors = {}     # ticker -> exception, for tickers with no prices yet
+        self._retries = {}    # ticker -> (failures, monotonic time of the next on-demand retry)
+        self._views = TTLCache(maxsize=MAX_VIEWS, ttl=float("inf"))
+
+        self._lock = threading.Lock()        # guards swapping the panel
+        self._load_lock = threading.Lock()   # one provider round-trip at a time
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def tickers(self) -> list:
+        panel = self._panel
+        return list(panel) if panel is not None else []
+
+    def panel(self, sectors: dict, benchmark: str) -> PricePanel:
+        """
+        PricePanel for `sectors` + `benchmark`, as memo_price_panel returns.
+
+        Served from memory; only tickers no session has asked for before, and
+        failed ones whose backoff has passed, are fetched (blocking this call).
+        Raises and warns like load_price_data for a missing benchmark or
+        sectors.
+        """
+        view_key = (tuple(sectors.items()), benchmark)
+        view = self._views.get(view_key)
+        if view is not None:
+            count("shared_store.hit")
+            return view
+
+        tickers = list(dict.fromkeys([benchmark, *sectors.values()]))
+        missing = self._unloaded(tickers)
+        if missing:
+            count("shared_store.miss", len(missing))
+            self._load(missing)
+
+        with self._lock:
+            panel, errors, version = self._panel, self._errors, self.version
+
+        frames = {ticker: panel[ticker] for ticker in tickers if panel is not None and ticker in panel}
+        data = assemble_price_data(sectors, benchmark, frames, {t: errors[t] for t in tickers if t in errors})
+        loader = partial(load_price_data, sectors, benchmark, self.period, **self.load_kwargs)
+        view = PricePanel.from_frames(data, fields_loader=loader)
+
+        # A refresh may have swapped the panel meanwhile; don't cache a stale
+        # view, nor one missing failed tickers that a later call may retry
+        if self.version == version and not any(ticker in errors for ticker in tickers):
+            self._views.set(view_key, view)
+        return view
+
+    def extend(self, period: str) -> bool:
+        """
+        Keep at least `period` of history from now on, re-loading every known
+        ticker if that is longer than the current period (e.g. on the first
+        switch to a longer timeframe). Shorter periods are a no-op.
+
+        Returns:
+            Whether the period was extended.
+        """
+        with self._load_lock:
+            current, wanted = period_start(self.period), period_start(period)
+            if current is None or (wanted is not None and wanted >= current):
+                return False
+            self.period = period
+        count("shared_store.extend")
+        self.refresh()
+        return True
+
+    def refresh(self) -> None:
+        """Re-fetch every known ticker and swap the result in."""
+        with span("shared_store.refresh", tickers=len(self.tickers) + len(self._errors)):
+            self._load(self.tickers + list(self._errors), refresh=True)
+
+    def _load(self, tickers: list, refresh: bool = False) -> None:
+        with self._load_lock:
+            if not refresh:
+                # Another session may have loaded (or failed) them while we waited
+                tickers = self._unloaded(tickers)
+            if not tickers:
+                return
+
+            frames, errors = {}, {}
+            for i in range(0, len(tickers), self.chunk_size):
+                f, e = fetch_price_frames(tickers[i:i + self.chunk_size], self.period, **self.load_kwargs)
+                frames.update(f)
+                errors.update(e)
+
+            for ticker, df in list(frames.items()):
+                if df.empty or "Close" not in df:
+                    errors[ticker] = ValueError(f"No data returned for {ticker}")
+                    del frames[ticker]
+
+            self._install(frames, errors)
+
+    def _unloaded(self, tickers: list) -> list:
+        """Tickers of `tickers` with no prices, leaving out failed ones still backing off."""
+        loaded = set(self.tickers)
+        now = time.monotonic()
+        return [
+            t for t in tickers
+            if t not in loaded and (t not in self._errors or now >= self._retries.get(t, (0, 0))[1])
+        ]
+
+    def _install(self, frames: dict, errors: dict) -> None:
+        """Merge freshly fetched closes over the current panel and swap it in."""
+        current = self._panel
+        merged = {ticker: current[ticker] for ticker in current} if current is not None else {}
+        merged.update({ticker: df[["Close"]] for ticker, df in frames.items()})
+
+        # Tickers with prices keep them on failure; the rest stay in _errors until a refresh succeeds
+        remaining = {t: e for t, e in {**self._errors, **errors}.items() if t not in merged}
+        for ticker, error in errors.items():
+            if ticker in merged:
+                print(f"Warning: Keeping previous prices for {ticker} after refresh failed: {str(error)}")
+
+        # Back off on-demand retries of tickers that failed again
+        now, cap = time.monotonic(), self.interval.total_seconds()
+        retries = {t: self._retries[t] for t in remaining if t in self._retries and t not in errors}
+        for ticker in errors:
+            if ticker in remaining:
+                failures = self._retries.get(ticker, (0, 0))[0] + 1
+                delay = min(self.retry_backoff.total_seconds() * 2 ** (failures - 1), cap)
+                retries[ticker] = (failures, now + delay)
+
+        panel = PricePanel.from_frames(merged) if merged else None
+        with self._lock:
+            self._panel = panel
+            self._errors = remaining
+            self._retries = retries
+            self.version += 1
+            self.refreshed_at = datetime.datetime.now(IST)
+            self._views.clear()
+
+    # --- Background refresh ---
+
+    def start(self) -> None:
+        """Start the refresh thread (once; it is a daemon and dies with the process)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rrg-price-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while True:
+            delay = (next_refresh(interval=self.interval) - datetime.datetime.now(IST)).total_seconds()
+            if self._stop.wait(max(delay, 0)):
+                return
+            if not self.tickers and not self._errors:
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Warning: Background price refresh failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Summary for the diagnostics panel."""
+        panel = self._panel
+        return {
+            "tickers": len(self.tickers),
+            "failed": len(self._errors),
+            "bytes": panel.nbytes if panel is not None else 0,
+            "version": self.version,
+            "refreshed_at": self.refreshed_at,
+            "next_refresh": next_refresh(interval=self.interval),
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store(period: str = None, **load_kwargs) -> SharedPriceStore:
+    """
+    The process-wide SharedPriceStore, created and started on first use.
+
+    Args:
+        period: History the caller needs; the store is created with it
+            (default "5y") and extended when a later caller needs more
+        load_kwargs: Only apply when the store is created
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedPriceStore(period or "5y", **load_kwargs)
+            _store.start()
+        store = _store
+    if period is not None:
+        store.extend(period)
+    return store
@@ -0,0 +1,118 @@
+import os
+
+import pandas as pd
+
+from backend.data import load_price_data
+from backend.rrg import calculate_rrg
+
+
+# Constituent lists, one CSV per universe (e.g. NSE's ind_nifty500list.csv)
+UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "universes")
+
+# Tickers per load_price_data call when loading a universe
+UNIVERSE_CHUNK_SIZE = 100
+
+
+def list_universes(universe_dir: str = UNIVERSE_DIR) -> dict:
+    """Map universe name (file stem) -> CSV path for every list in `universe_dir`."""
+    if not os.path.isdir(universe_dir):
+        return {}
+
+    return {
+        os.path.splitext(name)[0]: os.path.join(universe_dir, name)
+        for name in sorted(os.listdir(universe_dir))
+        if name.endswith(".csv")
+    }
+
+
+def load_universe(path: str, suffix: str = ".NS") -> pd.DataFrame:
+    """
+    Read a constituent list.
+
+    Accepts NSE's index constituent CSVs (Company Name, Industry, Symbol, ...),
+    whose symbols get the Yahoo `suffix` appended, or a plain CSV with
+    ticker, group and optional name columns.
+
+    Returns:
+        DataFrame with columns ticker, name, group; one row per constituent.
+    """
+    df = pd.read_csv(path)
+
+    if "Symbol" in df.columns:
+        universe = pd.DataFrame({
+            "ticker": df["Symbol"].str.strip() + suffix,
+            "name": df.get("Company Name", df["Symbol"]),
+            "group": df.get("Industry", "All"),
+        })
+    elif {"ticker", "group"} <= set(df.columns):
+        universe = pd.DataFrame({
+            "ticker": df["ticker"].str.strip(),
+            "name": df.get("name", df["ticker"]),
+            "group": df["group"],
+        })
+    else:
+        raise ValueError(f"Unrecognised universe file {path}. Columns: {df.columns.tolist()}")
+
+    return universe.drop_duplicates("ticker").reset_index(drop=True)
+
+
+def load_universe_prices(
+    universe: pd.DataFrame,
+    benchmark: str = "^NSEI",
+    period: str = "6mo",
+    chunk_size: int = UNIVERSE_CHUNK_SIZE,
+    loader=load_price_data,
+    **load_kwargs
+) -> dict:
+    """
+    Fetch prices for every constituent in chunks of `chunk_size` tickers.
+
+    Args:
+        universe: Output of load_universe
+        loader: load_price_data or a drop-in replacement such as
+            backend.memo.memo_price_data
+        load_kwargs: Passed through to `loader`
+
+    Returns:
+        load_price_data-style dict keyed by ticker, plus the benchmark.
+    """
+    tickers = universe["ticker"].tolist()
+    data = {}
+
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        try:
+            data.update(loader({ticker: ticker for ticker in chunk}, benchmark, period, **load_kwargs))
+        except ValueError as e:
+            # A chunk with no usable constituents shouldn't sink the rest
+            print(f"Warning: Skipping tickers {chunk[0]}..{chunk[-1]}: {str(e)}")
+            continue
+
+    if benchmark not in data:
+        raise ValueError("No constituent data could be loaded. Please check your internet connection and try again.")
+
+    return data
+
+
+def attach_groups(rrg_metrics: pd.DataFrame, universe: pd.DataFrame) -> pd.DataFrame:
+    """Add the constituent's `group` (industry) and `name` to calculate_rrg output."""
+    lookup = universe.set_index("ticker")
+    rrg_metrics = rrg_metrics.copy()
+    rrg_metrics["group"] = rrg_metrics["sector"].map(lookup["group"])
+    rrg_metrics["name"] = rrg_metrics["sector"].map(lookup["name"])
+    return rrg_metrics
+
+
+def calculate_universe_rrg(
+    data: dict,
+    universe: pd.DataFrame,
+    rs_period: int,
+    roc_period: int,
+    tail_length: int,
+    calculator=calculate_rrg
+) -> pd.DataFrame:
+    """
+    RRG for every constituent in one vectorized pass, tagged with its group
+    so the chart can drill down into a single industry.
+    """
+    return attach_groups(calculator(data, rs_period, roc_period, tail_length), universe)
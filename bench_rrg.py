@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the fetch, compute and render stages on synthetic data.
+
+Times load_price_data (against a local-file stand-in provider),
+calculate_rrg and plot_rrg figure construction separately for panels from
+10 to 5,000 tickers and 6 months to 20 years, and records figure JSON size
+and peak memory. Results are written as JSON so runs can be compared across
+commits:
+
+    python3 bench_rrg.py                        # full grid -> bench_results/<commit>.json
+    python3 bench_rrg.py --quick                # small grid for a fast sanity run
+    python3 bench_rrg.py --compare bench_results/abc1234.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backend.data import load_price_data
+from backend.providers import LocalFileProvider, SyntheticProvider
+from backend.rrg import calculate_rrg
+
+TICKER_COUNTS = [10, 100, 500, 1000, 5000]
+PERIODS = {"6mo": 126, "2y": 504, "5y": 1260, "20y": 5040}
+QUICK_TICKER_COUNTS = [10, 100]
+QUICK_PERIODS = {"6mo": 126, "2y": 504}
+
+# Skip panels above this many tickers x bars (5M cells is ~1 GB of OHLCV frames)
+MAX_CELLS = 5_000_000
+
+BENCHMARK = "^NSEI"
+END_DATE = "2024-12-31"   # fixed so every run sees identical prices
+RS_PERIOD, ROC_PERIOD, TAIL_LENGTH = 10, 12, 5
+REGRESSION_THRESHOLD = 1.20   # --compare flags stages that got 20% slower
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _measure(fn, repeats):
+    """Best-of-`repeats` wall time, then one traced run for peak memory."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, best, peak / 1e6
+
+
+def bench_panel(n_tickers, period, provider_kind, repeats):
+    tickers = {f"SYN{i:04d}": f"SYN{i:04d}" for i in range(n_tickers)}
+    synthetic = SyntheticProvider(seed=0, end=END_DATE)
+
+    with tempfile.TemporaryDirectory() as root:
+        if provider_kind == "local":
+            LocalFileProvider.save(synthetic.fetch([BENCHMARK, *tickers], period=period), root)
+            provider = LocalFileProvider(root)
+        else:
+            provider = synthetic
+
+        data, fetch_s, fetch_mb = _measure(
+            lambda: load_price_data(tickers, BENCHMARK, period=period, provider=provider),
+            repeats
+        )
+
+    rrg, compute_s, compute_mb = _measure(
+        lambda: calculate_rrg(data, RS_PERIOD, ROC_PERIOD, TAIL_LENGTH),
+        repeats
+    )
+
+    # Plotly is only needed for this stage
+    from backend.plot import plot_rrg
+    fig, render_s, render_mb = _measure(lambda: plot_rrg(rrg), repeats)
+
+    started = time.perf_counter()
+    figure_json = fig.to_json()
+    serialize_s = time.perf_counter() - started
+
+    return {
+        "tickers": n_tickers,
+        "period": period,
+        "bars": len(data[BENCHMARK]),
+        "fetch_s": fetch_s,
+        "fetch_peak_mb": fetch_mb,
+        "compute_s": compute_s,
+        "compute_peak_mb": compute_mb,
+        "render_s": render_s,
+        "render_peak_mb": render_mb,
+        "serialize_s": serialize_s,
+        "figure_json_bytes": len(figure_json),
+        "traces": len(fig.data),
+    }
+
+
+def compare(current, baseline_path):
+    """Print per-stage time ratios against a previous run; return True on regression."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    old = {(r["tickers"], r["period"]): r for r in baseline["results"]}
+    regressed = False
+
+    print(f"\nvs {baseline['meta']['commit']} ({baseline_path})")
+    for row in current["results"]:
+        prev = old.get((row["tickers"], row["period"]))
+        if prev is None:
+            continue
+
+        cells = []
+        for stage in ("fetch_s", "compute_s", "render_s", "serialize_s"):
+            ratio = row[stage] / prev[stage] if prev[stage] else float("nan")
+            flag = " ⚠️" if ratio > REGRESSION_THRESHOLD else ""
+            regressed |= ratio > REGRESSION_THRESHOLD
+            cells.append(f"{stage[:-2]} x{ratio:.2f}{flag}")
+        print(f"  {row['tickers']:>5} tickers {row['period']:>4}: " + ", ".join(cells))
+
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Small grid for a fast sanity run")
+    parser.add_argument("--provider", choices=["local", "synthetic"], default="local",
+                        help="local: Parquet snapshot on disk (includes I/O); synthetic: in-memory generator")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-cells", type=int, default=MAX_CELLS)
+    parser.add_argument("--output", help="Result file (default bench_results/<commit>.json)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    args = parser.parse_args(argv)
+
+    ticker_counts = QUICK_TICKER_COUNTS if args.quick else TICKER_COUNTS
+    periods = QUICK_PERIODS if args.quick else PERIODS
+
+    commit = _commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "provider": args.provider,
+            "params": {"rs_period": RS_PERIOD, "roc_period": ROC_PERIOD, "tail_length": TAIL_LENGTH},
+        },
+        "results": [],
+    }
+
+    for n_tickers in ticker_counts:
+        for period, bars in periods.items():
+            if n_tickers * bars > args.max_cells:
+                print(f"  skip {n_tickers:>5} tickers {period:>4} (over --max-cells)")
+                continue
+
+            row = bench_panel(n_tickers, period, args.provider, args.repeats)
+            report["results"].append(row)
+            print(f"  {n_tickers:>5} tickers {period:>4}: "
+                  f"fetch {row['fetch_s']:.3f}s  compute {row['compute_s']:.3f}s  "
+                  f"render {row['render_s']:.3f}s  json {row['figure_json_bytes'] / 1e3:,.0f} KB  "
+                  f"peak {max(row['fetch_peak_mb'], row['compute_peak_mb'], row['render_peak_mb']):,.0f} MB")
+
+    output = args.output or os.path.join("bench_results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare and compare(report, args.compare):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the data and RRG pipeline.
+Uses the synthetic and local-file providers, so no network is needed.
+"""
+
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend import data as data_module
+from backend import diagnostics
+from backend.alerts import ALERTS, QuadrantAlerts
+from backend.alignment import align_prices
+from backend.data import (
+    SECTOR_TICKERS,
+    FetchScheduler,
+    PriceCache,
+    TokenBucket,
+    fetch_price_frames,
+    load_price_data,
+    load_price_panel,
+    period_start,
+    required_bars,
+    rrg_window,
+    trim_history,
+)
+from backend.memo import PRICE_MEMO, SERIES_MEMO, clear_memo, memo_price_data, memo_rrg, memo_timeframe
+from backend.panel import PricePanel
+from backend.plot import plot_rrg, plot_rrg_animation
+from backend.providers import LocalFileProvider, SyntheticProvider
+from backend.replay import RRGReplay
+from backend.rrg import QUADRANTS, IncrementalRRG, calculate_rrg, rrg_history, rrg_sweep
+from backend.series_store import SeriesStore
+from backend.shared import IST, SharedPriceStore, next_refresh
+from backend.universe import calculate_universe_rrg, load_universe, load_universe_prices
+
+TEST_SECTORS = {
+    "IT": SECTOR_TICKERS["IT"],
+    "Bank": SECTOR_TICKERS["Bank"],
+    "FMCG": SECTOR_TICKERS["FMCG"],
+}
+
+
+def test_synthetic_provider_is_deterministic():
+    a = SyntheticProvider(seed=1, end="2024-06-28").fetch_one("^CNXIT", period="6mo")
+    b = SyntheticProvider(seed=1, end="2024-06-28").fetch_one("^CNXIT", period="6mo")
+    c = SyntheticProvider(seed=1, end="2024-06-28").fetch_one("^CNXFMCG", period="6mo")
+
+    pd.testing.assert_frame_equal(a, b)
+    assert not a["Close"].equals(c["Close"])
+    assert a.index.min() >= pd.Timestamp("2023-12-28")
+    assert a.index.max() == pd.Timestamp("2024-06-28")
+
+
+def test_fetch_modes_agree_on_synthetic_data():
+    provider = SyntheticProvider(seed=2, end="2024-06-28")
+    results = {
+        mode: load_price_data(TEST_SECTORS, "^NSEI", period="3mo", fetch_mode=mode, provider=provider)
+        for mode in ("batch", "serial", "concurrent")
+    }
+
+    for mode, data in results.items():
+        assert set(data) == {"^NSEI", *TEST_SECTORS}, mode
+        for key, df in data.items():
+            pd.testing.assert_frame_equal(df, results["batch"][key])
+
+
+def test_local_file_provider_replays_snapshot():
+    provider = SyntheticProvider(seed=3, end="2024-06-28")
+    snapshot = provider.fetch(["^NSEI", *TEST_SECTORS.values()], period="1y")
+
+    with tempfile.TemporaryDirectory() as root:
+        LocalFileProvider.save(snapshot, root)
+        data = load_price_data(TEST_SECTORS, "^NSEI", period="6mo", provider=LocalFileProvider(root))
+
+    expected = provider.fetch_one("^CNXIT", period="6mo")
+    pd.testing.assert_frame_equal(data["IT"], expected, check_freq=False)
+
+
+def test_missing_sector_is_skipped():
+    with tempfile.TemporaryDirectory() as root:
+        snapshot = SyntheticProvider(seed=4).fetch(["^NSEI", "^CNXIT"], period="6mo")
+        LocalFileProvider.save(snapshot, root, fmt="csv")
+
+        data = load_price_data(
+            {"IT": "^CNXIT", "Nope": "^MISSING"}, "^NSEI", provider=LocalFileProvider(root)
+        )
+
+    assert set(data) == {"^NSEI", "IT"}
+
+
+def test_rrg_pipeline_offline():
+    data = load_price_data(TEST_SECTORS, "^NSEI", provider=SyntheticProvider(seed=5))
+    rrg = calculate_rrg(data, rs_period=10, roc_period=12, tail_length=5)
+
+    assert set(rrg["sector"]) == set(TEST_SECTORS)
+    assert (rrg.groupby("sector").size() == 5).all()
+    assert rrg[["rs_ratio", "rs_momentum"]].notna().all().all()
+
+
+def _reference_rrg(data, rs_period, roc_period, tail_length):
+    """The original per-sector loop, kept as the oracle for the matrix engine."""
+    records = []
+    benchmark_close = data["^NSEI"]["Close"]
+    for sector, df in data.items():
+        if sector == "^NSEI":
+            continue
+        rel = (df["Close"] / benchmark_close).dropna()
+        rs_ratio = (rel / rel.ewm(span=rs_period, adjust=False).mean()) * 100
+        rs_momentum = (rs_ratio / rs_ratio.shift(roc_period)) * 100
+        rrg_df = pd.DataFrame({"rs_ratio": rs_ratio.values, "rs_momentum": rs_momentum.values}).dropna()
+        rrg_df["sector"] = sector
+        records.append(rrg_df.tail(tail_length))
+    return pd.concat(records, ignore_index=True)
+
+
+def test_matrix_rrg_matches_per_sector_loop():
+    provider = SyntheticProvider(seed=6, end="2024-06-28")
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=provider)
+
+    # Ragged histories: a late listing and holes on different dates per sector
+    data["IT"] = data["IT"].iloc[40:]
+    data["Bank"] = data["Bank"].drop(data["Bank"].index[[50, 51, 90]])
+    data["^NSEI"] = data["^NSEI"].drop(data["^NSEI"].index[[120]])
+
+    for rs_period, roc_period, tail_length in [(10, 12, 5), (5, 30, 20), (30, 5, 2)]:
+        got = calculate_rrg(data, rs_period, roc_period, tail_length)
+        expected = _reference_rrg(data, rs_period, roc_period, tail_length)
+        pd.testing.assert_frame_equal(got[expected.columns], expected)
+
+
+def test_incremental_rrg_matches_batch():
+    provider = SyntheticProvider(seed=7, end="2024-06-28")
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=provider)
+    data["Bank"] = data["Bank"].drop(data["Bank"].index[[-3]])   # holiday for one sector
+    split = data["^NSEI"].index[-30]
+
+    history = {key: df[df.index < split] for key, df in data.items()}
+    state = IncrementalRRG.from_prices(history, 10, 12, 5)
+    state.extend(data)
+
+    expected = calculate_rrg(data, 10, 12, 5)
+    got = state.to_frame()
+    assert np.array_equal(got["rs_ratio"].to_numpy(), expected["rs_ratio"].to_numpy())
+    assert np.array_equal(got["rs_momentum"].to_numpy(), expected["rs_momentum"].to_numpy())
+    assert got["sector"].tolist() == expected["sector"].tolist()
+
+
+def test_sweep_matches_calculate_rrg():
+    provider = SyntheticProvider(seed=8, end="2024-06-28")
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="6mo", provider=provider)
+    data["IT"] = data["IT"].iloc[-40:]   # short history: some tails are truncated
+
+    sweep = rrg_sweep(data, range(5, 31), range(5, 31), tail_length=20)
+    assert sweep.rs_momentum.shape == (26, 26, 3, 20)
+
+    for rs_period, roc_period, tail_length in [(5, 5, 2), (10, 12, 5), (30, 30, 20), (17, 28, 20)]:
+        pd.testing.assert_frame_equal(
+            sweep.frame(rs_period, roc_period, tail_length),
+            calculate_rrg(data, rs_period, roc_period, tail_length)
+        )
+
+
+def test_memo_layers_only_compute_what_changed():
+    clear_memo()
+    provider = SyntheticProvider(seed=9, end="2024-06-28")
+
+    data = memo_price_data({"IT": "^CNXIT", "Bank": "^NSEBANK"}, "^NSEI", provider=provider)
+    first = memo_rrg(data, 10, 12, 5, rs_periods=range(5, 31), roc_periods=range(5, 31), max_tail=20)
+    pd.testing.assert_frame_equal(first, calculate_rrg(data, 10, 12, 5))
+
+    # Adding a sector fetches only that ticker
+    misses = PRICE_MEMO.misses
+    data = memo_price_data({"IT": "^CNXIT", "Bank": "^NSEBANK", "FMCG": "^CNXFMCG"}, "^NSEI", provider=provider)
+    assert PRICE_MEMO.misses - misses == 1
+
+    # Slider moves within the precomputed grid are pure lookups
+    memo_rrg(data, 10, 12, 5, rs_periods=range(5, 31), roc_periods=range(5, 31), max_tail=20)
+    size = len(SERIES_MEMO)
+    for rs_period, roc_period, tail_length in [(30, 5, 20), (7, 9, 2)]:
+        got = memo_rrg(data, rs_period, roc_period, tail_length,
+                       rs_periods=range(5, 31), roc_periods=range(5, 31), max_tail=20)
+        pd.testing.assert_frame_equal(got, calculate_rrg(data, rs_period, roc_period, tail_length))
+    assert len(SERIES_MEMO) == size
+
+
+def test_plot_switches_to_webgl_for_large_universes():
+    provider = SyntheticProvider(seed=10, end="2024-06-28")
+    tickers = {f"T{i}": f"T{i}" for i in range(300)}
+    data = load_price_data(tickers, "^NSEI", provider=provider)
+    rrg = calculate_rrg(data, 10, 12, 5)
+
+    large = plot_rrg(rrg)
+    assert {trace.type for trace in large.data} == {"scattergl"}
+    assert len(large.data) < 20
+    assert len(large.layout.shapes) == 6   # quadrants and centre lines survive
+
+    # Many sectors with short tails: few points, but too many annotations for SVG
+    short = calculate_rrg(data, 10, 12, 2)
+    assert len(short) < 1000
+    assert {trace.type for trace in plot_rrg(short).data} == {"scattergl"}
+
+    small = plot_rrg(rrg[rrg["sector"].isin(["T0", "T1", "T2"])])
+    assert {trace.type for trace in small.data} == {"scatter"}
+    assert len(small.data) == 2 * 3
+
+    # One legend entry per sector, grouped with its tail so a click toggles both
+    legend = [trace for trace in small.data if trace.showlegend is not False]
+    assert [trace.name for trace in legend] == ["T0", "T1", "T2"]
+    assert all(trace.legendgroup == trace.name for trace in small.data)
+    assert len(small.layout.annotations) == 4 + 2 * 3   # quadrant labels, then an arrow and label per sector
+
+
+def test_universe_rrg_in_chunks():
+    universe = load_universe("universes/nifty_it.csv")
+    assert universe["ticker"].str.endswith(".NS").all()
+
+    data = load_universe_prices(universe, chunk_size=3, provider=SyntheticProvider(seed=11))
+    assert set(data) == {"^NSEI", *universe["ticker"]}
+
+    rrg = calculate_universe_rrg(data, universe, 10, 12, 5)
+    assert set(rrg["group"]) == {"Information Technology"}
+    assert rrg["name"].notna().all()
+
+
+def test_replay_frames_match_truncated_history():
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="2y", provider=SyntheticProvider(seed=12))
+    data["IT"] = data["IT"].drop(data["IT"].index[[100, 200, 201]])
+    replay = RRGReplay(data, 10, 12)
+
+    for date in replay.dates[[60, 202, 300, -1]]:
+        truncated = {key: df[df.index <= date] for key, df in data.items()}
+        pd.testing.assert_frame_equal(replay.frame(date, 5), calculate_rrg(truncated, 10, 12, 5))
+
+    fig = plot_rrg_animation(replay, 5, replay.replay_dates(5)[-250:])
+    assert len(fig.frames) == 250
+    assert all(len(trace.x) <= 5 for frame in fig.frames for trace in frame.data[:-1])
+
+
+def test_timeframes_resample_loaded_daily_prices():
+    clear_memo()
+    daily = load_price_data(TEST_SECTORS, "^NSEI", period="2y", provider=SyntheticProvider(seed=14))
+    weeks = daily["IT"].index.to_period("W-FRI")
+    daily["IT"] = daily["IT"][weeks != weeks[12]]   # a whole week missing
+
+    weekly = memo_timeframe(daily, "weekly")
+    assert memo_timeframe(daily, "weekly")["IT"] is weekly["IT"]
+    assert memo_timeframe(daily, "daily") is daily
+
+    for key, bars in weekly.items():
+        assert bars.index.isin(daily[key].index).all()
+        assert bars.index[-1] == daily[key].index[-1]
+        pd.testing.assert_series_equal(bars["Close"], daily[key]["Close"].loc[bars.index])
+        assert bars["Volume"].sum() == daily[key]["Volume"].sum()
+    assert len(weekly["IT"]) == len(weekly["Bank"]) - 1
+
+    monthly = memo_timeframe(daily, "monthly")
+    assert 24 <= len(monthly["^NSEI"]) <= 25
+    assert len(calculate_rrg(monthly, 5, 5, 5)) == 15
+    clear_memo()
+
+
+def test_price_panel_matches_frame_dict():
+    provider = SyntheticProvider(seed=15)
+    tickers = {f"T{i}": f"T{i}" for i in range(40)}
+    data = load_price_data(tickers, "^NSEI", period="2y", provider=provider)
+    data["T3"] = data["T3"].iloc[50:]
+    data["T4"] = data["T4"].drop(data["T4"].index[[7, 8, 300]])
+
+    panel = PricePanel.from_frames(data)
+    frames_bytes = sum(df.memory_usage(index=True).sum() for df in data.values())
+    assert panel.nbytes * 4 < frames_bytes
+    assert PricePanel.from_frames(data, np.float32).nbytes * 8 < frames_bytes
+
+    pd.testing.assert_series_equal(panel["T4"]["Close"], data["T4"]["Close"], check_names=False, check_freq=False)
+    pd.testing.assert_frame_equal(calculate_rrg(panel, 10, 12, 5), calculate_rrg(data, 10, 12, 5))
+    pd.testing.assert_frame_equal(
+        RRGReplay(panel, 10, 12).frame(panel.dates[-60], 5),
+        RRGReplay(data, 10, 12).frame(panel.dates[-60], 5)
+    )
+
+    clear_memo()
+    pd.testing.assert_frame_equal(memo_rrg(panel, 10, 12, 5), calculate_rrg(data, 10, 12, 5))
+    clear_memo()
+
+    # Other fields are only loaded when asked for
+    lazy = load_price_panel(TEST_SECTORS, "^NSEI", provider=provider)
+    assert lazy.nbytes == lazy.dates.nbytes + lazy.closes.nbytes
+    volume = lazy.frame("IT", fields=("Close", "Volume"))["Volume"]
+    expected_volume = load_price_data(TEST_SECTORS, "^NSEI", provider=provider)["IT"]["Volume"]
+    assert (volume.to_numpy() == expected_volume.to_numpy()).all()
+
+
+class _CountingProvider(SyntheticProvider):
+    """Synthetic prices that record every fetch and can be made to fail."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetched = []
+        self.fail = False
+
+    def fetch_one(self, ticker, timeout=None, **window):
+        self.fetched.append(ticker)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return super().fetch_one(ticker, timeout=timeout, **window)
+
+
+def test_shared_store_serves_sessions_from_memory():
+    provider = _CountingProvider(seed=16, end="2024-06-27")
+    store = SharedPriceStore(period="1y", fetch_mode="serial", provider=provider)
+
+    first = store.panel(TEST_SECTORS, "^NSEI")
+    assert sorted(provider.fetched) == sorted(["^NSEI", *TEST_SECTORS.values()])
+    assert store.panel(TEST_SECTORS, "^NSEI") is first
+
+    # Another session's subset and a new sector: only the new ticker is fetched
+    provider.fetched.clear()
+    subset = store.panel({"IT": TEST_SECTORS["IT"], "Auto": SECTOR_TICKERS["Auto"]}, "^NSEI")
+    assert provider.fetched == [SECTOR_TICKERS["Auto"]]
+    pd.testing.assert_series_equal(subset.close("IT"), first.close("IT"))
+
+    # A refresh picks up the new bar; a failed one keeps the last prices
+    provider.end = pd.Timestamp("2024-06-28")
+    provider.dates = pd.bdate_range(end=provider.end, periods=len(provider.dates))
+    store.refresh()
+    assert store.panel(TEST_SECTORS, "^NSEI").dates[-1] == provider.end
+
+    provider.fail = True
+    store.refresh()
+    assert store.panel(TEST_SECTORS, "^NSEI").dates[-1] == provider.end
+
+    # A longer timeframe extends the history of every loaded ticker; a shorter one changes nothing
+    provider.fail, provider.fetched = False, []
+    first_date = store.panel(TEST_SECTORS, "^NSEI").dates[0]
+    assert not store.extend("6mo") and provider.fetched == []
+    assert store.extend("2y")
+    assert sorted(provider.fetched) == sorted(["^NSEI", *TEST_SECTORS.values(), SECTOR_TICKERS["Auto"]])
+    assert store.panel(TEST_SECTORS, "^NSEI").dates[0] < first_date - pd.DateOffset(months=11)
+
+    monday_open = datetime.datetime(2024, 6, 24, 9, 15, tzinfo=IST)
+    assert next_refresh(monday_open) == monday_open + datetime.timedelta(minutes=15)
+    assert next_refresh(datetime.datetime(2024, 6, 24, 15, 35)) == datetime.datetime(2024, 6, 24, 15, 45, tzinfo=IST)
+    assert next_refresh(datetime.datetime(2024, 6, 28, 16, 0)) == datetime.datetime(2024, 7, 1, 9, 15, tzinfo=IST)
+
+
+def test_shared_store_retries_failed_tickers_with_backoff():
+    provider = _CountingProvider(seed=16, end="2024-06-28")
+    store = SharedPriceStore(
+        period="1y", fetch_mode="serial", provider=provider, retry_backoff=datetime.timedelta(seconds=0.2)
+    )
+    store.panel(TEST_SECTORS, "^NSEI")
+
+    provider.fail = True
+    sectors = {**TEST_SECTORS, "Auto": SECTOR_TICKERS["Auto"]}
+    assert "Auto" not in store.panel(sectors, "^NSEI")
+
+    # Within the backoff the failed ticker is not fetched again; after it, the next request retries
+    provider.fail, provider.fetched = False, []
+    assert "Auto" not in store.panel(sectors, "^NSEI")
+    assert provider.fetched == []
+    time.sleep(0.25)
+    assert "Auto" in store.panel(sectors, "^NSEI")
+    assert provider.fetched == [SECTOR_TICKERS["Auto"]]
+    assert store.stats()["failed"] == 0
+
+
+class _SlowProvider(SyntheticProvider):
+    """Rate-limited fake whose batch requests block until released."""
+
+    rate_limited = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def fetch_one(self, ticker, timeout=None, **window):
+        self.calls.append([ticker])
+        time.sleep(0.1)
+        return super().fetch_one(ticker, **window)
+
+    def fetch(self, tickers, **window):
+        self.calls.append(list(tickers))
+        self.entered.set()
+        self.release.wait(5)
+        return {ticker: super(_SlowProvider, self).fetch_one(ticker, **window) for ticker in tickers}
+
+
+class _CachedProvider(_CountingProvider):
+    """A _CountingProvider the disk cache serves, like Yahoo Finance."""
+
+    cacheable = True
+
+
+def test_disk_cache_plans_topups_and_falls_back():
+    today = pd.Timestamp.now().normalize()
+    with tempfile.TemporaryDirectory() as root:
+        saved, data_module._price_cache = data_module._price_cache, PriceCache(root, max_age=pd.Timedelta(0))
+        try:
+            cache = data_module._price_cache
+            old = _CachedProvider(seed=17, end=today - pd.Timedelta(days=14), years=3)
+            fetch_price_frames(["^NSEI"], "1y", "serial", provider=old)
+            first = cache.read("^NSEI")
+            assert old.fetched == ["^NSEI"]
+            assert cache.plan("^NSEI", period_start("1y")) == ("topup", first.index.max())
+
+            # Only the bars after the last cached one are fetched; the overlap is not duplicated
+            new = _CachedProvider(seed=17, years=3)
+            frames, errors = fetch_price_frames(["^NSEI"], "1y", "serial", provider=new)
+            topped = frames["^NSEI"]
+            assert not errors and topped.index.is_unique and topped.index.is_monotonic_increasing
+            assert topped.index.max() == new.dates[-1]
+            assert len(cache.read("^NSEI")) == len(first) + len(new.dates[new.dates > first.index.max()])
+
+            # A longer window than the cache holds is a full download
+            assert cache.plan("^NSEI", period_start("2y")) == ("full", None)
+
+            # A failed fetch falls back to the stale cache
+            new.fail = True
+            frames, errors = fetch_price_frames(["^NSEI"], "1y", "serial", provider=new)
+            assert not errors and frames["^NSEI"].equals(topped)
+
+            # Fresh files are served without fetching
+            cache.max_age = pd.Timedelta(hours=1)
+            new.fail, new.fetched = False, []
+            fetch_price_frames(["^NSEI"], "1y", "serial", provider=new)
+            assert new.fetched == []
+
+            cache.invalidate(["^NSEI"])
+            assert cache.read("^NSEI") is None
+        finally:
+            data_module._price_cache = saved
+
+
+def test_disk_cache_serves_max_period():
+    today = pd.Timestamp.now().normalize()
+    with tempfile.TemporaryDirectory() as root:
+        saved, data_module._price_cache = data_module._price_cache, PriceCache(root)
+        try:
+            cache = data_module._price_cache
+            provider = _CachedProvider(seed=18, end=today - pd.Timedelta(days=14), years=3)
+
+            # A shorter period's file does not cover "max"
+            fetch_price_frames(["^NSEI"], "1y", "serial", provider=provider)
+            assert cache.plan("^NSEI", None) == ("full", None)
+
+            full = fetch_price_frames(["^NSEI"], "max", "serial", provider=provider)[0]["^NSEI"]
+            assert full.index.equals(provider.dates)
+            provider.fetched.clear()
+            again = fetch_price_frames(["^NSEI"], "max", "serial", provider=provider)[0]["^NSEI"]
+            assert provider.fetched == [] and again.equals(full)
+
+            # A stale full history is topped up, not downloaded again
+            cache.max_age = pd.Timedelta(0)
+            assert cache.plan("^NSEI", None) == ("topup", full.index.max())
+            later = _CachedProvider(seed=18, years=3)
+            topped = fetch_price_frames(["^NSEI"], "max", "serial", provider=later)[0]["^NSEI"]
+            assert topped.index[0] == full.index[0] and topped.index[-1] == later.dates[-1]
+
+            cache.invalidate()
+            assert not os.listdir(root)
+        finally:
+            data_module._price_cache = saved
+
+
+def test_fetch_scheduler_coalesces_and_rate_limits():
+    provider = _SlowProvider(seed=17)
+    scheduler = FetchScheduler(rate=20, burst=2)
+
+    # Eight concurrent requests for one ticker share a single provider call
+    results = [None] * 8
+    def fetch_nsei(i):
+        results[i] = scheduler.fetch_one(provider, "^NSEI", period="6mo")
+    threads = [threading.Thread(target=fetch_nsei, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert provider.calls == [["^NSEI"]]
+    assert all(df is results[0] for df in results)
+
+    # A batch only requests tickers that are not already in flight
+    provider.calls.clear()
+    first = threading.Thread(target=scheduler.fetch, args=(provider, ["A", "B"]), kwargs={"period": "6mo"})
+    first.start()
+    provider.entered.wait(5)
+    second = {}
+    def fetch_overlap():
+        second["result"] = scheduler.fetch(provider, ["B", "C"], period="6mo")
+    overlap = threading.Thread(target=fetch_overlap)
+    overlap.start()
+    time.sleep(0.1)
+    provider.release.set()
+    first.join()
+    overlap.join()
+    assert provider.calls == [["A", "B"], ["C"]]
+    frames, errors = second["result"]
+    assert set(frames) == {"B", "C"} and not errors
+
+    metrics = scheduler.metrics()
+    assert metrics["requests"] == 8 + 4
+    assert metrics["coalesced"] == 7 + 1
+    assert metrics["provider_calls"] == 1 + 2
+    assert metrics["in_flight"] == 0
+
+    # Token bucket: 2 back to back, then 20 per second
+    bucket = TokenBucket(rate=20, burst=2)
+    waited = sum(bucket.acquire() for _ in range(6))
+    assert waited >= 0.15
+
+
+def test_multi_benchmark_rrg_matches_single_benchmark_runs():
+    benchmarks = ["^NSEI", "^CRSLDX", "NIFTY_MIDCAP_100.NS"]
+    data = load_price_data(
+        {**TEST_SECTORS, **{b: b for b in benchmarks[1:]}}, "^NSEI", period="1y", provider=SyntheticProvider(seed=18)
+    )
+    data["IT"] = data["IT"].iloc[30:]
+    data["^CRSLDX"] = data["^CRSLDX"].drop(data["^CRSLDX"].index[[40, 41]])
+
+    multi = calculate_rrg(data, 10, 12, 5, benchmark=benchmarks)
+    assert list(multi["benchmark"].unique()) == benchmarks
+    pd.testing.assert_frame_equal(calculate_rrg(PricePanel.from_frames(data), 10, 12, 5, benchmark=benchmarks), multi)
+
+    sweep = rrg_sweep(data, [8, 10], [12], 5, benchmark=benchmarks)
+    pd.testing.assert_frame_equal(sweep.frame(10, 12), multi)
+
+    clear_memo()
+    pd.testing.assert_frame_equal(memo_rrg(data, 10, 12, 5, benchmark=benchmarks, rs_periods=[8, 10]), multi)
+    clear_memo()
+
+    for benchmark in benchmarks:
+        single = {key: df for key, df in data.items() if key in TEST_SECTORS or key == benchmark}
+        rows = multi[multi["benchmark"] == benchmark].drop(columns="benchmark").reset_index(drop=True)
+        pd.testing.assert_frame_equal(rows, calculate_rrg(single, 10, 12, 5, benchmark=benchmark))
+
+
+def test_calendar_alignment_fill_policy_and_report():
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=SyntheticProvider(seed=19))
+    dates = data["^NSEI"].index
+    data["IT"] = data["IT"].iloc[20:].drop(dates[[60, 61, 62, 100]])
+    data["Bank"] = data["Bank"].drop(dates[[80]])
+    data["^NSEI"] = data["^NSEI"].drop(dates[[150]])
+
+    aligned = align_prices(data, "^NSEI")
+    assert aligned.closes.shape == (len(dates), 3) and aligned.closes.flags.c_contiguous
+    report = aligned.report
+    assert report.loc["IT", ["bars", "missing", "extra", "filled"]].tolist() == [len(dates) - 24, 4, 1, 0]
+    assert report.loc["Bank", ["missing", "extra"]].tolist() == [1, 1]
+    assert report.loc["^NSEI", "missing"] == 1
+    assert report.loc["IT", "first"] == dates[20]
+
+    # "none" keeps the per-sector dropna result
+    pd.testing.assert_frame_equal(calculate_rrg(data, 10, 12, 5, fill="none"), calculate_rrg(data, 10, 12, 5))
+
+    # "ffill" carries closes over benchmark trading days, at most fill_limit in a row
+    filled = align_prices(data, "^NSEI", fill="ffill", fill_limit=2)
+    assert filled.report.loc["IT", "filled"] == 3 and filled.report.loc["Bank", "filled"] == 1
+    it = pd.Series(filled.closes[:, 0], index=filled.dates)
+    assert it[dates[60]] == it[dates[61]] == data["IT"]["Close"][dates[59]]
+    assert np.isnan(it[dates[62]]) and np.isnan(it[dates[19]])
+
+    on_benchmark = data["^NSEI"].index
+    expected = {
+        key: df if key == "^NSEI" else df.reindex(on_benchmark).ffill(limit_area="inside").dropna()
+        for key, df in data.items()
+    }
+    pd.testing.assert_frame_equal(
+        calculate_rrg(data, 10, 12, 5, fill="ffill"),
+        _reference_rrg(expected, 10, 12, 5)[["rs_ratio", "rs_momentum", "sector"]]
+    )
+    pd.testing.assert_frame_equal(
+        memo_rrg(PricePanel.from_frames(data), 10, 12, 5, fill="ffill"), calculate_rrg(data, 10, 12, 5, fill="ffill")
+    )
+    clear_memo()
+
+
+def test_history_window_matches_full_history_within_tolerance():
+    assert required_bars(10, 12, 5, tolerance=1e-3) == 35 + 12 + 5
+    assert required_bars(10, 12, 5, tolerance=0) is None
+    assert rrg_window(10, 12, 5) == (52, "3mo")
+    assert rrg_window(30, 30, 20, "weekly")[1] == "5y"
+
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="2y", provider=SyntheticProvider(seed=20, end="2024-06-28"))
+    full = calculate_rrg(data, 10, 12, 5)
+    for tolerance in (1e-3, 1e-6):
+        bars = required_bars(10, 12, 5, tolerance)
+        trimmed = trim_history(data, bars)
+        assert all(len(df) == bars for df in trimmed.values())
+        got = calculate_rrg(trimmed, 10, 12, 5)
+        np.testing.assert_allclose(got[["rs_ratio", "rs_momentum"]], full[["rs_ratio", "rs_momentum"]], rtol=tolerance)
+
+    panel = trim_history(PricePanel.from_frames(data), 52)
+    pd.testing.assert_frame_equal(calculate_rrg(panel, 10, 12, 5), calculate_rrg(trim_history(data, 52), 10, 12, 5))
+    assert trim_history(data, None) is data
+
+
+def test_trim_history_drops_tickers_that_stopped_trading():
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=SyntheticProvider(seed=20, end="2024-06-28"))
+    data["Bank"] = data["Bank"].iloc[:-60]   # delisted before the window
+
+    for prices in (data, PricePanel.from_frames(data)):
+        trimmed = trim_history(prices, 52)
+        assert set(trimmed) == {"^NSEI", "IT", "FMCG"}
+        rrg = memo_rrg(trimmed, 10, 12, 5)
+        assert set(rrg["sector"]) == {"IT", "FMCG"}
+
+
+def test_quadrant_alerts_match_per_sector_scan():
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=SyntheticProvider(seed=21))
+    data["Bank"] = data["Bank"].drop(data["Bank"].index[[100, 101]])
+    rs_ratio, rs_momentum = rrg_history(data, 10, 12)
+
+    # History ends where calculate_rrg's tails end
+    last = calculate_rrg(data, 10, 12, 1).set_index("sector")["rs_ratio"]
+    pd.testing.assert_series_equal(rs_ratio.ffill().iloc[-1], last, check_names=False)
+
+    expected = []
+    for sector in rs_ratio.columns:
+        both = pd.concat([rs_ratio[sector], rs_momentum[sector]], axis=1).dropna()
+        names = [QUADRANTS[2 * (r >= 100) + (m >= 100)] for r, m in both.to_numpy()]
+        expected += [(date, sector, a, b) for date, a, b in zip(both.index[1:], names, names[1:]) if a != b]
+    expected.sort(key=lambda event: (event[0], list(rs_ratio.columns).index(event[1])))
+
+    alerts = QuadrantAlerts.from_prices(data, 10, 12)
+    events = alerts.events()
+    assert list(events[["date", "sector", "from", "to"]].itertuples(index=False, name=None)) == expected
+    assert set(events["alert"]) <= {*ALERTS.values(), "Jump"}
+    diagonal = events["from"].map(QUADRANTS.index) ^ events["to"].map(QUADRANTS.index) == 3
+    assert ((events["alert"] == "Jump") == diagonal).all()
+
+    # Bar by bar gives the same events as one batch
+    incremental = QuadrantAlerts.from_history(rs_ratio.iloc[:-20], rs_momentum.iloc[:-20])
+    for date in rs_ratio.index[-20:]:
+        incremental.update(rs_ratio.loc[date].dropna().to_dict(), rs_momentum.loc[date].dropna().to_dict(), date)
+    pd.testing.assert_frame_equal(incremental.events(), events)
+    pd.testing.assert_series_equal(incremental.quadrants(), alerts.quadrants())
+    assert incremental.update({"IT": 90.0}, {"IT": 90.0}, rs_ratio.index[-1]).empty
+
+    # A counter-clockwise step is named, a diagonal one is a jump
+    reverse = QuadrantAlerts(["IT"])
+    reverse.update({"IT": 102.0}, {"IT": 98.0}, "2024-07-01")
+    assert list(reverse.update({"IT": 102.0}, {"IT": 101.0}, "2024-07-02")["alert"]) == ["Regaining momentum"]
+    assert list(reverse.update({"IT": 98.0}, {"IT": 97.0}, "2024-07-03")["alert"]) == ["Jump"]
+    assert len(reverse.events(alerts_only=True)) == 1
+
+
+def test_series_store_appends_match_full_recomputation():
+    data = load_price_data(TEST_SECTORS, "^NSEI", period="1y", provider=SyntheticProvider(seed=22, end="2024-06-28"))
+    data["IT"] = data["IT"].iloc[30:]
+    data["Bank"] = data["Bank"].drop(data["Bank"].index[[100, 200]])
+    cut = data["^NSEI"].index[-25]
+
+    with tempfile.TemporaryDirectory() as root:
+        store = SeriesStore(root)
+        store.update({key: df[df.index < cut] for key, df in data.items()}, 10, 12)
+
+        # Prices that no longer reach back to the last stored bar would leave a gap
+        try:
+            store.update(trim_history(data, 20), 10, 12)
+        except ValueError as e:
+            assert "last stored bar" in str(e)
+        else:
+            raise AssertionError("expected a ValueError for a gap")
+
+        assert store.update(data, 10, 12) == {sector: 25 for sector in TEST_SECTORS}
+        assert store.update(data, 10, 12) == {}
+
+        # Appended days continue the EMA exactly
+        rs_ratio, rs_momentum = rrg_history(data, 10, 12)
+        for sector in TEST_SECTORS:
+            traded = rs_ratio[sector].notna()
+            expected = pd.DataFrame({"rs_ratio": rs_ratio[sector][traded], "rs_momentum": rs_momentum[sector][traded]})
+            expected.index = expected.index.as_unit("ns")
+            pd.testing.assert_frame_equal(
+                store.range(sector, "^NSEI", 10, 12), expected, check_names=False, check_freq=False
+            )
+        assert len(store.range("FMCG", "^NSEI", 10, 12, start=cut)) == 25
+
+        replay, stored = RRGReplay(data, 10, 12), store.replay(list(TEST_SECTORS), "^NSEI", 10, 12)
+        assert stored.replay_dates(5).equals(replay.replay_dates(5))
+        for date in replay.replay_dates(5)[[0, 100, -1]]:
+            pd.testing.assert_frame_equal(stored.frame(date, 5), replay.frame(date, 5))
+
+        # A torn record from an interrupted append is ignored, then overwritten
+        path = store.path("IT", "^NSEI", 10, 12)
+        with open(path, "ab") as f:
+            f.write(b"\0" * 7)
+        assert len(store.series("IT", "^NSEI", 10, 12)) == rs_ratio["IT"].notna().sum()
+        nxt = data["^NSEI"].index[-1] + pd.offsets.BDay()
+        more = {key: pd.concat([df, df.iloc[[-1]].set_axis([nxt])]) for key, df in data.items()}
+        # A bar whose session is still open is left for the next update
+        assert store.update(more, 10, 12, now=datetime.datetime(2024, 7, 1, 11, 0)) == {}
+        assert store.update(more, 10, 12)["IT"] == 1
+        assert store.range("IT", "^NSEI", 10, 12).index[-1] == nxt
+
+    # Likewise the still-open week of resampled bars
+    weekly = memo_timeframe(data, "weekly")
+    with tempfile.TemporaryDirectory() as root:
+        store = SeriesStore(root)
+        appended = store.update(weekly, 10, 12, timeframe="weekly", now=datetime.datetime(2024, 6, 27, 16, 0))
+        assert store.range("IT", "^NSEI", 10, 12).index[-1] == pd.Timestamp("2024-06-21")
+        assert store.update(weekly, 10, 12, timeframe="weekly", now=datetime.datetime(2024, 6, 28, 16, 0)) == {
+            sector: 1 for sector in appended
+        }
+
+
+def _run_cli(args, provider):
+    """backend.cli.main(args) in a fresh interpreter with RRG_PRICE_PROVIDER=provider."""
+    return subprocess.run(
+        [sys.executable, "-c", f"import sys; from backend.cli import main; sys.exit(main({args!r}))"],
+        capture_output=True, text=True, env={**os.environ, "RRG_PRICE_PROVIDER": provider}
+    )
+
+
+def test_cli_exports_one_file_per_universe_and_benchmark():
+    with tempfile.TemporaryDirectory() as root:
+        result = _run_cli([
+            "--universe", "sectors", "--universe", "nifty_it",
+            "--benchmark", "^NSEI", "--benchmark", "^CNX100",
+            "--timeframe", "weekly", "--format", "csv", "--output-dir", root
+        ], "synthetic:19")
+        assert result.returncode == 0, result.stderr
+        assert sorted(os.listdir(root)) == [
+            "nifty_it__CNX100.csv", "nifty_it__NSEI.csv", "sectors__CNX100.csv", "sectors__NSEI.csv"
+        ]
+
+        rrg = pd.read_csv(os.path.join(root, "sectors__NSEI.csv"))
+        assert set(rrg["benchmark"]) == {"^NSEI"}
+        assert set(rrg["timeframe"]) == {"weekly"}
+        assert set(rrg["quadrant"]) <= set(QUADRANTS)
+        assert len(rrg) == 5 * len(SECTOR_TICKERS)
+
+        # --store keeps the whole history, not just the trimmed RRG window
+        store_dir = os.path.join(root, "series")
+        result = _run_cli(["--store", store_dir, "--output-dir", os.path.join(root, "stored")], "synthetic:19")
+        assert result.returncode == 0, result.stderr
+        stored = SeriesStore(os.path.join(store_dir, "daily")).series("IT", "^NSEI", 10, 12)
+        assert len(stored) > 250 * 19
+
+        # A benchmark with no data fails its pair (and the exit code) but not the others
+        snapshot = SyntheticProvider(seed=19).fetch(["^NSEI", *SECTOR_TICKERS.values()], period="1y")
+        LocalFileProvider.save(snapshot, os.path.join(root, "prices"))
+        out = os.path.join(root, "missing")
+        result = _run_cli(
+            ["--benchmark", "^NSEI", "--benchmark", "^MISSING", "--format", "csv", "--output-dir", out],
+            f"local:{os.path.join(root, 'prices')}"
+        )
+        assert result.returncode == 1
+        assert "^MISSING" in result.stderr
+        assert os.listdir(out) == ["sectors__NSEI.csv"]
+
+
+def test_diagnostics_spans_only_when_enabled():
+    provider = SyntheticProvider(seed=13)
+    diagnostics.reset()
+    calculate_rrg(load_price_data(TEST_SECTORS, "^NSEI", fetch_mode="serial", provider=provider), 10, 12, 5)
+    assert diagnostics.snapshot() == ([], {})
+
+    diagnostics.enable()
+    try:
+        data = load_price_data(TEST_SECTORS, "^NSEI", fetch_mode="serial", provider=provider)
+        plot_rrg(calculate_rrg(data, 10, 12, 5))
+        spans, _ = diagnostics.snapshot()
+    finally:
+        diagnostics.enable(False)
+        diagnostics.reset()
+
+    stages = {row["stage"]: row["calls"] for row in diagnostics.summarize(spans)}
+    assert stages == {"fetch.ticker": 4, "fetch": 1, "align": 1, "calculate_rrg": 1, "plot_rrg": 1}
+    assert {entry["ticker"] for entry in spans if entry["stage"] == "fetch.ticker"} == {"^NSEI", *TEST_SECTORS.values()}
+
+
+def test_diagnostics_collectors_are_per_run():
+    provider = SyntheticProvider(seed=13)
+    collected = {}
+
+    def run(name, sectors, fetch_mode):
+        collector = diagnostics.collect()
+        load_price_data(sectors, "^NSEI", fetch_mode=fetch_mode, provider=provider)
+        collected[name] = collector.snapshot()[0]
+
+    sessions = [
+        threading.Thread(target=run, args=("a", {"IT": TEST_SECTORS["IT"]}, "concurrent")),
+        threading.Thread(target=run, args=("b", TEST_SECTORS, "serial")),
+    ]
+    for thread in sessions:
+        thread.start()
+    for thread in sessions:
+        thread.join()
+
+    # Worker-thread spans reach their run's collector; nothing leaks between runs or into the global log
+    fetched = {name: {e["ticker"] for e in spans if e["stage"] == "fetch.ticker"} for name, spans in collected.items()}
+    assert fetched == {"a": {"^NSEI", "^CNXIT"}, "b": {"^NSEI", *TEST_SECTORS.values()}}
+    assert diagnostics.snapshot() == ([], {})
+    assert not diagnostics.is_enabled()
+
+
+# Import-time budget for compute-only entry points (python -X importtime)
+COMPUTE_MODULES = ["backend.rrg", "backend.data", "backend.memo", "backend.cli"]
+HEAVY_MODULES = {"yfinance", "plotly", "streamlit", "curl_cffi", "requests"}
+OWN_IMPORT_BUDGET_US = 150_000     # self time of backend.* modules combined
+TOTAL_IMPORT_BUDGET_US = 3_000_000  # everything, numpy and pandas included
+
+
+def test_compute_imports_stay_light():
+    for module in COMPUTE_MODULES:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, check=True
+        )
+
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(own), int(cumulative), name.strip()))
+
+        imported = {name.split(".")[0] for _, _, name in rows}
+        assert not imported & HEAVY_MODULES, f"{module} imports {imported & HEAVY_MODULES}"
+
+        own = sum(us for us, _, name in rows if name.startswith("backend"))
+        total = sum(us for us, _, _ in rows)
+        assert own < OWN_IMPORT_BUDGET_US, f"{module}: backend modules took {own}us"
+        assert total < TOTAL_IMPORT_BUDGET_US, f"{module}: import took {total}us"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")